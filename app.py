@@ -1,11 +1,32 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import numpy as np
 import os
 import time
+import json
+import threading
+import io
+from collections import OrderedDict
+import openpyxl
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Without pyarrow downloads are offered as CSV / Excel only
+    pa = None
+    pq = None
+
+from investment_data import (
+    STRICT_DATA_CHECKS, calculate_user_metrics, freeze_data, get_company_daily, get_data_refresher,
+    get_timing_log, get_user_platform_charges_data, get_user_reinvestment_data, profit_table_page,
+    timed, timed_function, user_profit_positions, user_profit_totals,
+)
+from investment_charts import (
+    PROFIT_TREND_MAX_POINTS, company_profit_trend, create_company_investment_vs_profit_chart,
+    create_company_profit_graph, create_investment_vs_profit_chart, create_investor_comparison_chart,
+)
 
 # Page configuration
 st.set_page_config(
@@ -15,6 +36,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Animation mode: 'client' runs every animation in the browser with CSS, 'server' replays the
+# original time.sleep driven animations (each one blocks the script thread while it plays)
+ANIMATION_MODE = os.environ.get("DASHBOARD_ANIMATION_MODE", "client")
+CLIENT_ANIMATIONS = ANIMATION_MODE != "server"
+
 # Initialize session state for popup
 if 'show_popup' not in st.session_state:
     st.session_state.show_popup = True  # Changed to True by default
@@ -280,6 +306,69 @@ st.markdown("""
         to { transform: translateY(0); opacity: 1; }
     }
     
+    /* Client-side welcome typewriter (typed out, held, then collapsed - no server sleeps) */
+    .typewriter-welcome {
+        text-align: center;
+        overflow: hidden;
+        max-height: 4rem;
+        animation: collapseAway 0.3s ease-in 2s forwards;
+    }
+    .typewriter-welcome span {
+        display: inline-block;
+        white-space: nowrap;
+        clip-path: inset(0 100% 0 0);
+        animation: typing 1.5s steps(30, end) forwards;
+    }
+    .typewriter-welcome span::after {
+        content: '|';
+        animation: blinkCaret 0.5s step-end infinite;
+    }
+    @keyframes typing {
+        to { clip-path: inset(0 0 0 0); }
+    }
+    @keyframes blinkCaret {
+        50% { opacity: 0; }
+    }
+    @keyframes collapseAway {
+        to { opacity: 0; max-height: 0; margin: 0; padding: 0; }
+    }
+    
+    /* Client-side count-up for metric values (CSS counter, then the exact formatted value) */
+    @property --count-up-value {
+        syntax: '<integer>';
+        initial-value: 0;
+        inherits: false;
+    }
+    .count-up-metric-label {
+        font-size: 0.875rem;
+    }
+    .count-up-metric-value {
+        position: relative;
+        font-size: 2.25rem;
+        line-height: 1.4;
+    }
+    .count-up-metric-value::before {
+        content: '₹' counter(count-up);
+        counter-reset: count-up var(--count-up-value);
+        position: absolute;
+        left: 0;
+        animation: countUp 0.4s steps(20, end) forwards, hideCounter 0s linear 0.4s forwards;
+    }
+    .count-up-metric-value .count-up-final {
+        animation: showFinal 0s linear 0.4s both;
+    }
+    @keyframes countUp {
+        from { --count-up-value: 0; }
+        to { --count-up-value: var(--count-up-target); }
+    }
+    @keyframes hideCounter {
+        to { visibility: hidden; }
+    }
+    @keyframes showFinal {
+        from { visibility: hidden; }
+        to { visibility: visible; }
+    }
+    
     /* Pending Alert Banner */
     .pending-banner {
         background: linear-gradient(90deg, #FF6B6B, #FF8E53);
@@ -440,517 +529,775 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-@st.cache_data(ttl=300)
+# Number of serialized Plotly figures kept in memory (shared by all sessions, LRU evicted)
+FIGURE_CACHE_MAX_ENTRIES = 256
+# Formatted tables / metric texts kept per (data version, user, view), shared the same way
+DISPLAY_CACHE_MAX_ENTRIES = 512
+# Downloads: formats offered (label -> extension, MIME type), rows written per chunk, the total
+# size of finished files kept for repeat downloads, and the most data rows a sheet can hold
+EXPORT_FORMATS = {
+    "CSV": ('csv', "text/csv"),
+    "Excel": ('xlsx', "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ('parquet', "application/vnd.apache.parquet"),
+}
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_CACHE_MAX_BYTES = int(os.environ.get("DASHBOARD_EXPORT_CACHE_MB", "64")) * 2 ** 20
+EXCEL_MAX_DATA_ROWS = 1_048_575
+# Installed Streamlit as (major, minor), for features newer than the oldest supported version
+STREAMLIT_VERSION = tuple(int(part) for part in st.__version__.split('.')[:2])
+# From Streamlit 1.52 a download's data can be a callable, only called when the button is clicked
+# (on_click="ignore" came in 1.45); older versions need the bytes up front and get a "Prepare"
+# button instead
+DEFERRED_DOWNLOADS = STREAMLIT_VERSION >= (1, 52)
+# Amount columns kept numeric (so they sort and align as numbers) show two decimals; thousands
+# separators in a NumberColumn format ("%,.2f") need Streamlit 1.55
+AMOUNT_COLUMN_FORMAT = "%,.2f" if STREAMLIT_VERSION >= (1, 55) else "%.2f"
+# Profit details table: rows per page choices and the sort orders offered (label -> profit_table_page order)
+PROFIT_TABLE_PAGE_SIZES = [25, 50, 100, 250]
+PROFIT_TABLE_DEFAULT_PAGE_SIZE = 50
+PROFIT_TABLE_SORTS = {
+    "Date (newest first)": 'date_desc',
+    "Date (oldest first)": 'date_asc',
+    "Profit (highest first)": 'profit_desc',
+    "Profit (lowest first)": 'profit_asc',
+}
+# The performance panel (timings, memory and cache stats) is shown with DASHBOARD_PERF_PANEL=1,
+# or for a single visit with ?perf=1 in the URL
+PERF_PANEL_ENABLED = os.environ.get("DASHBOARD_PERF_PANEL") == "1"
+PERF_QUERY_PARAM = "perf"
+
+@timed_function
 def load_excel_data():
-    """Load all sheets from the Excel file"""
-    # Show loading animation
+    """Return the current dataset (kept fresh in the background)"""
+    refresher = get_data_refresher()
+    if refresher.current is not None:
+        return refresher.current
+    
+    # First load in this process - there is nothing to serve yet, so fetch and open it in the
+    # foreground (tables are parsed as the page reads them and warmed in the background)
     loading_placeholder = st.empty()
     with loading_placeholder.container():
         with st.spinner('📊 Loading latest investment data...'):
             try:
-                # Updated Excel file name
-                github_url = "https://raw.githubusercontent.com/Arun2310Rajaputhra/INVESTORS-DASHBOARD/main/INVESTMENT_APP_DETAILS_UPDATE.xlsx"
-                excel_data = pd.ExcelFile(github_url)
-                
-                # Load all sheets
-                sheets = {}
-                for sheet_name in excel_data.sheet_names:
-                    if sheet_name in ['Platform_Maintaince_Charges', 'Platform_Maintenance_Charges', 'Charges']:
-                        df = excel_data.parse(sheet_name)
-                        df.columns = df.columns.str.strip()
-                        sheets[sheet_name] = df
-                    else:
-                        sheets[sheet_name] = excel_data.parse(sheet_name)
+                data = refresher.refresh()
                 
                 # Success animation
-                st.success("✅ Data loaded successfully!")
-                time.sleep(0.5)
-                
-                return sheets
+                if CLIENT_ANIMATIONS:
+                    # Slides in and fades out in the browser, outside the placeholder that is cleared below
+                    success_message = "✅ Data loaded successfully!"
+                else:
+                    st.success("✅ Data loaded successfully!")
+                    time.sleep(0.5)
+                    success_message = None
             except Exception as e:
                 st.error(f"❌ Error loading data: {str(e)}")
-                return {}
+                return None
             finally:
-                time.sleep(0.5)
+                if not CLIENT_ANIMATIONS:
+                    time.sleep(0.5)
                 loading_placeholder.empty()
-
-def calculate_user_metrics(user_id, data):
-    """Calculate all metrics for a specific user"""
-    # Get investor details
-    investor_df = data.get('Investor_Details', pd.DataFrame())
-    daily_profits_df = data.get('Daily_Profits_Calculations', pd.DataFrame())
-    daily_report_df = data.get('Daily_Report', pd.DataFrame())
     
-    # Filter for current user
-    user_info = investor_df[investor_df['UserID'] == user_id]
+    if success_message:
+        st.markdown(f"""<div class='success-message'>
+            <div class='stAlert' style='background-color: #d4edda; color: #155724; padding: 1rem; border-radius: 5px;'>
+                {success_message}
+            </div>
+        </div>""", unsafe_allow_html=True)
+    return data
+
+def format_age(seconds):
+    """Short human-readable age, e.g. '45s', '12 min', '3 h'"""
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min"
+    return f"{seconds / 3600:.1f} h"
+
+def show_data_status():
+    """Show which data version is being served and how old it is"""
+    status = get_data_refresher().status()
+    if status['version'] is None:
+        return
+    st.caption(f"📦 Data version `{status['version']}` · loaded {format_age(status['age_seconds'])} ago · "
+               f"checked {format_age(status['checked_seconds_ago'])} ago")
+    if status['source'] in ('cached', 'bundled'):
+        st.warning("⚠️ Could not reach the data source - showing the last available data.")
+    elif status['last_error']:
+        st.warning(f"⚠️ Latest refresh failed, showing the previous data: {status['last_error']}")
+
+
+class LRUCache:
+    """Thread-safe LRU cache shared by all sessions, bounded by the total size of its values
+
+    Every value has size 1 unless a subclass says otherwise, so max_size is an entry count.
+    """
+    
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def size_of(self, value):
+        return 1
+    
+    def get(self, key):
+        """Return (found, value)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def put(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self.size -= self.size_of(self._entries[key])
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self.size += self.size_of(value)
+            # The newest value is kept even when it alone is over the budget
+            while self.size > self.max_size and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= self.size_of(evicted)
+    
+    def __len__(self):
+        return len(self._entries)
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    """Process-wide cache of serialized Plotly figures"""
+    return LRUCache(FIGURE_CACHE_MAX_ENTRIES)
+
+def cached_figure(data, chart_kind, build, *view_params):
+    """Figure for (data version, chart kind, view params), built and serialized at most once
+
+    The figure JSON is what gets cached, so repeat views and other sessions skip the
+    Python-level build (hover text, shapes, px) and only rehydrate the stored spec.
+    """
+    cache = get_figure_cache()
+    key = (data.version, chart_kind) + view_params
+    with timed(f"figure:{chart_kind}"):
+        found, figure_json = cache.get(key)
+        if not found:
+            fig = build()
+            figure_json = fig.to_json() if fig is not None else None
+            cache.put(key, figure_json)
+        if figure_json is None:
+            return None
+        # The spec came out of a validated figure, so skip plotly's (slow) property validation
+        return go.Figure(json.loads(figure_json), _validate=False)
+
+def format_rupee(value, symbol='₹'):
+    """One amount as shown everywhere in the dashboard: ₹1,234.50"""
+    return f"{symbol}{value:,.2f}"
+
+def display_table(df, rename, columns=None):
+    """A table as the dashboard shows it: selected columns under their display names"""
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df.rename(columns={col: name for col, name in rename.items() if col in df.columns})
+
+def amount_column_config(columns, symbol=''):
+    """Column config showing numeric amount columns with two decimals (they stay sortable numbers)"""
+    return {col: st.column_config.NumberColumn(format=symbol + AMOUNT_COLUMN_FORMAT) for col in columns}
+
+@st.cache_resource(show_spinner=False)
+def get_display_cache():
+    """Process-wide cache of formatted tables and metric texts"""
+    return LRUCache(DISPLAY_CACHE_MAX_ENTRIES)
+
+def cached_display(data, kind, user_id, build, *view_params):
+    """Formatted output for (data version, kind, user, view params), built at most once and shared"""
+    cache = get_display_cache()
+    key = (data.version, kind, user_id) + view_params
+    found, value = cache.get(key)
+    if not found:
+        value = freeze_data(build())
+        cache.put(key, value)
+    return value
+
+class ExportCache(LRUCache):
+    """LRU cache of finished download files, bounded by their total size in bytes instead of a count"""
     
-    if user_info.empty:
-        return None
+    def size_of(self, payload):
+        return len(payload)
+
+@st.cache_resource(show_spinner=False)
+def get_export_cache():
+    """Process-wide cache of download files"""
+    return ExportCache(EXPORT_CACHE_MAX_BYTES)
+
+def export_chunks(frame, positions=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """The rows of frame (or just those at positions, in that order) as DataFrames of chunk_rows"""
+    total = len(frame) if positions is None else len(positions)
+    for start in range(0, total, chunk_rows):
+        if positions is None:
+            yield frame.iloc[start:start + chunk_rows]
+        else:
+            yield frame.iloc[positions[start:start + chunk_rows]]
+
+def write_csv_export(frame, chunks, out, sheet_name):
+    """CSV, header once and then chunk by chunk (same text as one frame.to_csv)"""
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='')
+    frame.iloc[:0].to_csv(text, index=False)
+    for chunk in chunks:
+        chunk.to_csv(text, index=False, header=False)
+    text.flush()
+    text.detach()
+
+def write_xlsx_export(frame, chunks, out, sheet_name):
+    """Excel through openpyxl's write-only mode, which streams rows instead of keeping cells"""
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append([str(col) for col in frame.columns])
+    for chunk in chunks:
+        # Empty cells instead of NaN / NaT, which Excel would show as errors
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(out)
+
+def write_parquet_export(frame, chunks, out, sheet_name):
+    """Parquet with one row group per chunk"""
+    # Mixed-type and all-empty object columns are written as text in every chunk, so each
+    # chunk matches the schema fixed by the first one
+    text_columns = [col for col in frame.columns if frame[col].dtype == object]
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    for col in text_columns:
+        schema = schema.set(schema.get_field_index(str(col)), pa.field(str(col), pa.string()))
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in chunks:
+            for col in text_columns:
+                chunk = chunk.assign(**{col: chunk[col].where(chunk[col].isna(), chunk[col].astype(str))})
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+EXPORT_WRITERS = {
+    'csv': write_csv_export,
+    'xlsx': write_xlsx_export,
+    'parquet': write_parquet_export,
+}
+
+def build_export(frame, extension, positions=None, sheet_name="Data"):
+    """File bytes of frame's rows (or those at positions) in one of the EXPORT_FORMATS
+
+    Rows are converted and written a chunk at a time, so a multi-year export never holds a
+    copy of the whole selection or its full text next to the file being written.
+    """
+    out = io.BytesIO()
+    EXPORT_WRITERS[extension](frame, export_chunks(frame, positions), out, sheet_name)
+    return out.getvalue()
+
+def export_formats(rows):
+    """Labels of the formats that can hold this many rows here"""
+    formats = []
+    for label, (extension, _) in EXPORT_FORMATS.items():
+        if extension == 'parquet' and pq is None:
+            continue
+        if extension == 'xlsx' and rows > EXCEL_MAX_DATA_ROWS:
+            continue
+        formats.append(label)
+    return formats
+
+def export_download(data, kind, user_id, frame, label, file_stem, sheet_name, positions=None, filters=()):
+    """Format picker and download button for a table; the file is only built when it is asked for
+
+    Files are cached per (data version, kind, user, filters, format), so a repeat download -
+    by this session or another - is served from memory.
+    """
+    rows = len(frame) if positions is None else len(positions)
+    format_label = st.radio(f"{label} format", export_formats(rows), horizontal=True,
+                            key=f"{kind}_export_format", label_visibility="collapsed")
+    extension, mime = EXPORT_FORMATS[format_label]
+    cache = get_export_cache()
+    key = (data.version, kind, user_id) + tuple(filters) + (extension,)
+    
+    def payload():
+        with timed(f"export:{kind}:{extension}") as span:
+            found, body = cache.get(key)
+            if not found:
+                body = build_export(frame, extension, positions, sheet_name)
+                cache.put(key, body)
+            span['rows'] = rows
+            return body
+    
+    file_name = f"{file_stem}.{extension}"
+    if DEFERRED_DOWNLOADS:
+        # Built on click, on a separate thread; downloading doesn't rerun the page
+        st.download_button(label=label, data=payload, file_name=file_name, mime=mime,
+                           key=f"{kind}_download", on_click="ignore")
+        return
     
-    metrics = {
-        'user_id': user_id,
-        'name': user_info.iloc[0]['Name'] if 'Name' in user_info.columns else user_info.iloc[0]['Contact_Name'],
-        'total_investment': float(user_info.iloc[0]['Total_Invested_Amount']),
-        'total_profit': float(user_info.iloc[0]['Total Profit Earned']) if 'Total Profit Earned' in user_info.columns else 0,
-    }
+    ready_key = f"{kind}_export_ready"
+    if st.session_state.get(ready_key) != key:
+        if not st.button(f"⚙️ Prepare {format_label} file", key=f"{kind}_export_prepare"):
+            return
+        st.session_state[ready_key] = key
+    st.download_button(label=label, data=payload(), file_name=file_name, mime=mime, key=f"{kind}_download")
+
+# Dashboard sections rerun independently as fragments, so a widget only rebuilds the section it
+# belongs to (st.fragment needs Streamlit >= 1.37; older versions rerun the whole page)
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
+@fragment
+@timed_function
+def investment_vs_profit_section(data, selected_user):
+    """Investment vs profit chart with the 'Your Data Only / Compare' toggle"""
+    # Investment vs Profit Chart - Candle Type Bars (NEW ADDITION)
+    st.markdown('<div class="light-red-heading">💹 Investment vs Profit Analysis</div>', unsafe_allow_html=True)
+    
+    # Add toggle for viewing all users vs current user only
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        view_option = st.radio(
+            "View:",
+            ["Your Data Only", "Compare with Other Investors"],
+            horizontal=True,
+            label_visibility="collapsed"
+        )
     
-    # Calculate ROI
-    if metrics['total_investment'] > 0:
-        metrics['roi'] = (metrics['total_profit'] / metrics['total_investment']) * 100
+    # Create chart based on selection
+    if view_option == "Your Data Only":
+        profit_chart = cached_figure(
+            data, 'investment_vs_profit',
+            lambda: create_investment_vs_profit_chart(data, selected_user),
+            selected_user
+        )
     else:
-        metrics['roi'] = 0
-    
-    # Calculate expected monthly returns (average daily profit × 30)
-    user_daily_profits = daily_report_df[daily_report_df['UserID'] == user_id]
-    user_daily_profits = user_daily_profits[user_daily_profits['Profit'] > 0]  # Exclude negatives
+        profit_chart = cached_figure(
+            data, 'investor_comparison',
+            lambda: create_investor_comparison_chart(data, selected_user),
+            selected_user
+        )
     
-    if not user_daily_profits.empty:
-        avg_daily_profit = user_daily_profits['Profit'].mean()
-        metrics['expected_monthly'] = avg_daily_profit * 30
-        metrics['avg_daily_profit'] = avg_daily_profit
+    if profit_chart:
+        # Wrap in transparent container
+        st.markdown("<div class='plotly-container'>", unsafe_allow_html=True)
+        st.plotly_chart(profit_chart, use_container_width=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        # REMOVED: ROI insights section below the chart (as requested)
+        # Just show tip for comparison view
+        if view_option == "Compare with Other Investors":
+            st.info("💡 **Tip:** Compare your investment performance with other investors. Hover over bars to see detailed metrics.")
     else:
-        metrics['expected_monthly'] = 0
-        metrics['avg_daily_profit'] = 0
-    
-    # Get investment history
-    user_investments = daily_profits_df[daily_profits_df['UserID'] == user_id]
-    user_investments = user_investments[user_investments['User_Invested_Amount'].notna()]
-    
-    investment_history = []
-    for _, row in user_investments.iterrows():
-        investment_history.append({
-            'date': row['Date'] if pd.notna(row['Date']) else row['Transaction_Date'],
-            'amount': row['User_Invested_Amount'],
-            'transaction_id': row.get('Transaction_ID', 'N/A')
-        })
-    metrics['investment_history'] = investment_history
-    
-    return metrics
+        st.info("No data available for the investment vs profit chart.")
 
-def get_user_reinvestment_data(user_id, data):
-    """Get re-investment details for specific user"""
-    re_invest_df = data.get('Re_Investment_Details', pd.DataFrame())
-    if re_invest_df.empty:
-        return pd.DataFrame()
-    
-    # Try different possible column names for UserID
-    user_id_column = None
-    possible_column_names = ['UserID', 'Userid', 'USERID', 'userid', 'User ID', 'User_Id']
-    
-    for col in possible_column_names:
-        if col in re_invest_df.columns:
-            user_id_column = col
-            break
-    
-    if user_id_column:
-        # Filter for user
-        user_reinvest = re_invest_df[re_invest_df[user_id_column] == user_id].copy()
-        
-        # Select only required columns
-        required_columns = ['Re-Invest_ID', 'Requested_Amount', 'Total_Added_Amount', 
-                          'Pending_Amount_To_Be_Add', 'Applied_To_Main_Investment_Status']
-        
-        # Filter only existing columns
-        available_columns = [col for col in required_columns if col in user_reinvest.columns]
-        
-        if not user_reinvest.empty and available_columns:
-            return user_reinvest[available_columns]
+def profit_trend_window(data):
+    """Date range control for a long company profit trend (None while the whole history fits)"""
+    trend = company_profit_trend(data)
+    if len(trend) <= PROFIT_TREND_MAX_POINTS:
+        return None
     
-    return pd.DataFrame()
+    # Plotly zoom events never reach the server, so the visible range is picked here and the
+    # figure is re-sampled for it; narrow enough and it becomes the exact plot again
+    first_day, last_day = trend['Date'].iloc[0].date(), trend['Date'].iloc[-1].date()
+    start, end = st.slider(
+        "Profit trend range:",
+        min_value=first_day,
+        max_value=last_day,
+        value=(first_day, last_day),
+        format="DD MMM YYYY",
+        key="profit_trend_window"
+    )
+    if (start, end) == (first_day, last_day):
+        return None
+    return (start, end)
 
-def get_user_platform_charges_data(user_id, data):
-    """Get platform charges details for specific user - SIMPLE VERSION like Re-Investment section"""
-    # Try to get the sheet with the correct name
-    charges_df = data.get('Platofrm_Maintaince_Charges', pd.DataFrame())
-    
-    # If not found, try alternative names
-    if charges_df.empty:
-        charges_df = data.get('Platform_Maintaince_Charges', pd.DataFrame())
-    
-    if charges_df.empty:
-        charges_df = data.get('Platform_Maintenance_Charges', pd.DataFrame())
-    
-    if charges_df.empty:
-        charges_df = data.get('Charges', pd.DataFrame())
-    
-    if charges_df.empty:
-        return pd.DataFrame()
+@fragment
+@timed_function
+def company_performance_section(data):
+    """Company profit trend and company investment vs profit charts"""
+    # Company Profit Trend and Company Investment vs Profit
+    st.markdown('<div class="light-red-heading">📊 Company Performance</div>', unsafe_allow_html=True)
+    
+    # Company Profit Graph
+    date_window = profit_trend_window(data)
+    profit_fig = cached_figure(data, 'company_profit',
+                               lambda: create_company_profit_graph(data, date_window), date_window)
+    if profit_fig:
+        # Wrap plotly chart in a transparent container
+        st.markdown("<div class='plotly-container'>", unsafe_allow_html=True)
+        st.plotly_chart(profit_fig, use_container_width=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+    else:
+        st.info("No profit data available for graph.")
+    
+    # NEW: Company Investment vs Profit Candle Chart
+    company_chart = cached_figure(data, 'company_investment_vs_profit',
+                                  lambda: create_company_investment_vs_profit_chart(data))
+    if company_chart:
+        st.markdown("<div class='plotly-container'>", unsafe_allow_html=True)
+        st.plotly_chart(company_chart, use_container_width=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+    else:
+        st.info("No data available for company investment vs profit chart.")
+
+@fragment
+@timed_function
+def profit_details_section(data, metrics):
+    """Date range / payment status filters with the filtered profit table"""
+    # Filtered Data Table
+    st.markdown('<div class="light-red-heading">📋 Your Profit Details (Filtered Data)</div>', unsafe_allow_html=True)
+    
+    # Filters live inside this section, so changing them only reruns this table
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        start_date = st.date_input("Start Date", 
+                                  value=datetime.now() - timedelta(days=30),
+                                  key="filter_start_date")
+    with col2:
+        end_date = st.date_input("End Date", 
+                                value=datetime.now(),
+                                key="filter_end_date")
+    with col3:
+        # Payment status filter
+        payment_status = st.selectbox(
+            "Payment Status:",
+            ["All", "Completed", "Pending", "Recovered", "Re-Invest"],
+            key="filter_payment_status"
+        )
     
-    # Try different possible column names for UserID
-    user_id_column = None
-    possible_column_names = ['UserID', 'Userid', 'USERID', 'userid', 'User ID', 'User_Id']
+    date_range = [start_date, end_date]
     
-    for col in possible_column_names:
-        if col in charges_df.columns:
-            user_id_column = col
-            break
+    # Get filtered data (row positions only - just the visible page is copied and sent)
+    rows = user_profit_positions(metrics['user_id'], data, date_range, payment_status)
     
-    if user_id_column:
-        # Filter for user
-        user_charges = charges_df[charges_df[user_id_column] == user_id].copy()
+    if rows is not None and len(rows[1]):
+        frame, positions = rows
+        # Display summary stats with animation (totals come from the precomputed running sums)
+        total_profit_filtered, profit_rows = user_profit_totals(metrics['user_id'], data, date_range, payment_status)
+        avg_daily_filtered = total_profit_filtered / profit_rows if profit_rows else float('nan')
         
-        # Select only required columns as specified
-        required_columns = ['Charge_ID', 'Reason_For_Charge', 'Charge_Per_Head', 'Paid_Amt', 'Pending_Amt']
+        col1, col2 = st.columns(2)
+        with col1:
+            # Animated counter for total profit
+            if CLIENT_ANIMATIONS:
+                # Counts up in the browser (single render, no server sleeps)
+                st.markdown(count_up_metric_html(f"Total Profit ({date_range[0]} to {date_range[1]})",
+                                                 total_profit_filtered), unsafe_allow_html=True)
+            else:
+                placeholder = st.empty()
+                for i in range(0, int(total_profit_filtered) + 1, max(1, int(total_profit_filtered/20))):
+                    placeholder.metric(f"Total Profit ({date_range[0]} to {date_range[1]})", 
+                                     format_rupee(i))
+                    time.sleep(0.02)
+                placeholder.metric(f"Total Profit ({date_range[0]} to {date_range[1]})", 
+                                 format_rupee(total_profit_filtered))
         
-        # Filter only existing columns
-        available_columns = [col for col in required_columns if col in user_charges.columns]
+        with col2:
+            st.metric(f"Average Daily Profit", 
+                     format_rupee(avg_daily_filtered))
         
-        if not user_charges.empty and available_columns:
-            return user_charges[available_columns]
-    
-    return pd.DataFrame()
+        # Sorting and paging happen here on the server
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            sort_label = st.selectbox("Sort by:", list(PROFIT_TABLE_SORTS), key="profit_table_sort")
+        with col2:
+            page_size = st.selectbox("Rows per page:", PROFIT_TABLE_PAGE_SIZES,
+                                     index=PROFIT_TABLE_PAGE_SIZES.index(PROFIT_TABLE_DEFAULT_PAGE_SIZE),
+                                     key="profit_table_page_size")
+        
+        # Any change to what is listed starts again from the first page
+        query = (metrics['user_id'], start_date, end_date, payment_status, sort_label, page_size)
+        if st.session_state.get('profit_table_query') != query:
+            st.session_state.profit_table_query = query
+            st.session_state.profit_table_cursor = None
+        
+        page_positions, offset, next_cursor, previous_cursor = profit_table_page(
+            frame, positions, PROFIT_TABLE_SORTS[sort_label], page_size, st.session_state.profit_table_cursor
+        )
+        
+        # Display the table with fade-in animation
+        st.markdown("<div class='fade-in'>", unsafe_allow_html=True)
+        
+        # Update display columns to include Total_Profit AND Remarks (missing columns are skipped);
+        # the page is sliced and renamed once per data version, user and page, and the amounts
+        # stay numeric so the column sorts as numbers (₹ is in the headers)
+        amount_cols = ['Your Investment (₹)', 'Company Total Investment (₹)', 'Your Profit With Tax(₹)', 'Company Profit (₹)']
+        display_cols = ['Date', 'Invest_Amount', 'Company_Total_Invest', 'Profit', 'Total_Profit', 'Payment', 'Remarks']
+        page_data = cached_display(
+            data, 'profit_page', metrics['user_id'],
+            lambda: display_table(frame.iloc[page_positions], {
+                'Date': 'Date',
+                'Invest_Amount': 'Your Investment (₹)',
+                'Company_Total_Invest': 'Company Total Investment (₹)',
+                'Profit': 'Your Profit With Tax(₹)',
+                'Total_Profit': 'Company Profit (₹)',
+                'Payment': 'Payment Status',
+                'Remarks': 'Remarks - Complete Explanation about your Profit goes where and why it deducted'
+            }, columns=display_cols),
+            *query, offset
+        )
+        
+        # Simple dataframe display with Remarks column
+        st.dataframe(
+            page_data,
+            use_container_width=True,
+            hide_index=True,
+            column_config=amount_column_config(amount_cols)
+        )
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("◀ Previous", key="profit_table_previous", disabled=previous_cursor is None,
+                      on_click=set_profit_table_cursor, args=(previous_cursor,), use_container_width=True)
+        with col2:
+            st.caption(f"Rows {offset + 1:,}–{offset + len(page_positions):,} of {len(positions):,}")
+        with col3:
+            st.button("Next ▶", key="profit_table_next", disabled=next_cursor is None,
+                      on_click=set_profit_table_cursor, args=(next_cursor,), use_container_width=True)
+        
+        # Download button for filtered data (every filtered row, newest first)
+        export_download(data, 'profit_details', metrics['user_id'], frame, "📥 Download Filtered Data",
+                        f"{metrics['user_id']}_profit_data", "Profit Data",
+                        positions=positions, filters=(start_date, end_date, payment_status))
+    else:
+        st.info("No data found for the selected filters.")
 
-def create_company_profit_graph(data):
-    """Create company profit graph (excluding negatives) with transparent style from Code 2"""
-    daily_report_df = data.get('Daily_Report', pd.DataFrame())
-    
-    if daily_report_df.empty:
-        return None
-    
-    # Group by date and sum profits (exclude negatives)
-    daily_report_df['Date'] = pd.to_datetime(daily_report_df['Date'])
-    company_daily = daily_report_df[daily_report_df['Profit'] > 0].groupby('Date')['Profit'].sum().reset_index()
-    
-    if company_daily.empty:
-        return None
-    
-    # Using style from Code 2
-    fig = px.line(
-        company_daily,
-        x='Date',
-        y='Profit',
-        title='📈 Company Daily Profit Trend (Positive Profits Only)',
-        markers=True,
-        line_shape='spline',
-        color_discrete_sequence=['#00ff88']  # From Code 2
-    )
-    
-    fig.update_layout(
-        xaxis_title='Date',
-        yaxis_title='Total Profit (₹)',
-        hovermode='x unified',
-        template='plotly_dark',  # Changed from Code 1's 'plotly_white' to Code 2's 'plotly_dark'
-        plot_bgcolor='rgba(0,0,0,0)',  # From Code 2
-        paper_bgcolor='rgba(0,0,0,0)',  # From Code 2
-        font_color='white',  # From Code 2
-        transition={'duration': 500}
-    )
-    
-    return fig
+def set_profit_table_cursor(cursor):
+    """Button callback: move the profit table to the page starting at cursor"""
+    st.session_state.profit_table_cursor = cursor
 
-def create_investment_vs_profit_chart(data, selected_user=None):
-    """Create candle-type vertical bar chart for investment vs profit"""
-    investor_df = data.get('Investor_Details', pd.DataFrame())
-    
-    if investor_df.empty:
-        return None
-    
-    # Prepare data for all users or specific user
-    if selected_user:
-        investor_df = investor_df[investor_df['UserID'] == selected_user]
-        if investor_df.empty:
-            return None
-    
-    # Sort by total investment (descending) for better visualization
-    investor_df = investor_df.sort_values('Total_Invested_Amount', ascending=False)
-    
-    # Get top 10 users if too many
-    if len(investor_df) > 10 and not selected_user:
-        investor_df = investor_df.head(10)
-    
-    # Create figure
-    fig = go.Figure()
-    
-    # Add Investment bars (base)
-    fig.add_trace(go.Bar(
-        x=investor_df['Name'] if 'Name' in investor_df.columns else investor_df['Contact_Name'],
-        y=investor_df['Total_Invested_Amount'],
-        name='Total Investment',
-        marker_color='#1E88E5',  # Blue
-        opacity=0.8,
-        width=0.4,
-        offset=-0.2,  # Position to left
-        text=[f'₹{x:,.0f}' for x in investor_df['Total_Invested_Amount']],
-        textposition='auto',
-        hovertext=[
-            f"<b>{name}</b><br>" +
-            f"Investment: ₹{inv:,.2f}<br>" +
-            f"Profit: ₹{profit:,.2f}<br>" +
-            f"ROI: {roi:.1f}%"
-            for name, inv, profit, roi in zip(
-                investor_df['Name'] if 'Name' in investor_df.columns else investor_df['Contact_Name'],
-                investor_df['Total_Invested_Amount'],
-                investor_df['Total Profit Earned'] if 'Total Profit Earned' in investor_df.columns else [0]*len(investor_df),
-                (investor_df['Total Profit Earned'] / investor_df['Total_Invested_Amount'] * 100) if 'Total Profit Earned' in investor_df.columns else [0]*len(investor_df)
-            )
-        ],
-        hoverinfo='text'
-    ))
-    
-    # Add Profit bars (on top)
-    profit_column = 'Total Profit Earned' if 'Total Profit Earned' in investor_df.columns else 'Total Profit'
-    
-    # Determine profit colors (green for positive, red for negative)
-    profit_colors = []
-    for profit in investor_df[profit_column]:
-        if profit >= 0:
-            profit_colors.append('#00C853')  # Green
-        else:
-            profit_colors.append('#FF5252')  # Red
-    
-    fig.add_trace(go.Bar(
-        x=investor_df['Name'] if 'Name' in investor_df.columns else investor_df['Contact_Name'],
-        y=investor_df[profit_column],
-        name='Total Profit',
-        marker_color=profit_colors,
-        opacity=0.8,
-        width=0.4,
-        offset=0.2,  # Position to right
-        text=[f'₹{x:,.0f}' for x in investor_df[profit_column]],
-        textposition='auto',
-        hovertext=[
-            f"<b>{name}</b><br>" +
-            f"Investment: ₹{inv:,.2f}<br>" +
-            f"Profit: ₹{profit:,.2f}<br>" +
-            f"Status: {'Profit' if profit >= 0 else 'Loss'}<br>" +
-            f"ROI: {roi:.1f}%"
-            for name, inv, profit, roi in zip(
-                investor_df['Name'] if 'Name' in investor_df.columns else investor_df['Contact_Name'],
-                investor_df['Total_Invested_Amount'],
-                investor_df[profit_column],
-                (investor_df[profit_column] / investor_df['Total_Invested_Amount'] * 100)
-            )
-        ],
-        hoverinfo='text'
-    ))
-    
-    # Add connecting lines between bars (optional, creates candle effect)
-    for i, (inv, profit) in enumerate(zip(investor_df['Total_Invested_Amount'], investor_df[profit_column])):
-        # Add line from investment bar to profit bar
-        fig.add_shape(
-            type="line",
-            x0=i-0.1, x1=i+0.1,
-            y0=inv, y1=inv,
-            line=dict(color="rgba(255,255,255,0.3)", width=1),
+@fragment
+@timed_function
+def reinvestment_section(data, metrics):
+    """Re-investment details table and download"""
+    # NEW SECTION: Re-Investment Details
+    st.markdown('<div class="light-red-heading">🔄 Your Re-Investment Details</div>', unsafe_allow_html=True)
+    
+    # Get re-investment data
+    reinvest_data = get_user_reinvestment_data(metrics['user_id'], data)
+    
+    if not reinvest_data.empty:
+        # Display the re-investment table
+        # Define column renaming for better display
+        column_rename = {
+            'Re-Invest_ID': 'Request ID',
+            'Requested_Amount': 'Requested Amount',
+            'Total_Added_Amount': 'Till Now Added Amount',
+            'Pending_Amount_To_Be_Add': 'Still Pending Amount To Add',
+            'Applied_To_Main_Investment_Status': 'Updated To Main Investment'
+        }
+        
+        # Only rename columns that exist in the data
+        rename_dict = {col: column_rename[col] for col in reinvest_data.columns if col in column_rename}
+        
+        # Display names once per data version and user; the amounts stay numbers shown with ₹
+        currency_columns = ['Requested Amount', 'Till Now Added Amount', 'Still Pending Amount To Add']
+        display_df = cached_display(
+            data, 'reinvestments', metrics['user_id'],
+            lambda: display_table(reinvest_data, rename_dict)
         )
-    
-    # Update layout
-    fig.update_layout(
-        title='📊 Investment vs Profit Analysis (Candle-Type Bars)',
-        xaxis_title='Investors',
-        yaxis_title='Amount (₹)',
-        barmode='group',
-        bargap=0.15,
-        bargroupgap=0.1,
-        hovermode='x unified',
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        template='plotly_dark',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font_color='white',
-        height=500 if selected_user else 600,
-        margin=dict(l=50, r=50, t=80, b=100)
-    )
-    
-    # Format y-axis with ₹ symbol
-    fig.update_yaxes(tickprefix='₹ ')
-    
-    # Rotate x-axis labels for better readability
-    fig.update_xaxes(tickangle=45)
-    
-    return fig
+        
+        st.dataframe(
+            display_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config=amount_column_config(currency_columns, symbol='₹')
+        )
+        
+        # Download button for re-investment data (keep original format for download)
+        export_download(data, 'reinvestments', metrics['user_id'], reinvest_data, "📥 Download Re-Investment Data",
+                        f"{metrics['user_id']}_reinvestment_data", "Re-Investment")
+    else:
+        st.info("No re-investment records found.")
 
-def create_company_investment_vs_profit_chart(data):
-    """Create candle-type vertical bar chart for COMPANY investment vs profit"""
-    investor_df = data.get('Investor_Details', pd.DataFrame())
-    
-    if investor_df.empty:
-        return None
-    
-    # Get company totals
-    company_total_investment = investor_df['Total_Invested_Amount'].sum() if 'Total_Invested_Amount' in investor_df.columns else 0
-    
-    # Get total company profit from Daily_Report
-    daily_report_df = data.get('Daily_Report', pd.DataFrame())
-    total_company_profit = 0
-    if not daily_report_df.empty:
-        # Get unique daily Total_Profit values
-        daily_report_df['Date'] = pd.to_datetime(daily_report_df['Date'])
-        unique_daily = daily_report_df.drop_duplicates(subset=['Date'], keep='first')
+@fragment
+@timed_function
+def platform_charges_section(data, metrics, charges_data, total_pending):
+    """Platform charges table, pending total and download"""
+    # UPDATED: Platform Charges Status - SIMPLE VERSION like Re-Investment
+    st.markdown('<div class="bright-red-heading">⚠️ Platform Charges Status</div>', unsafe_allow_html=True)
+    
+    # Check if popup should be shown for the first time (for users with pending)
+    if total_pending > 0 and 'popup_shown' not in st.session_state:
+        st.session_state.show_popup = True
+        st.session_state.popup_shown = True
+    
+    if not charges_data.empty:
+        # Display the platform charges table
+        # Define column renaming as specified
+        column_rename = {
+            'Charge_ID': 'Charge ID',
+            'Reason_For_Charge': 'Reason',
+            'Charge_Per_Head': 'Charge Per Person',
+            'Paid_Amt': 'Paid',
+            'Pending_Amt': 'Pending'
+        }
         
-        # Try to find Total_Profit column
-        profit_column = None
-        possible_column_names = ['Total_Profit', 'Total Profit', 'TotalProfit', 'total_profit']
+        # Only rename columns that exist in the data
+        rename_dict = {col: column_rename[col] for col in charges_data.columns if col in column_rename}
         
-        for col in possible_column_names:
-            if col in unique_daily.columns:
-                profit_column = col
-                break
+        # Display names once per data version and user; the amounts stay numbers shown with ₹
+        currency_columns = ['Charge Per Person', 'Paid', 'Pending']
+        display_df = cached_display(
+            data, 'platform_charges', metrics['user_id'],
+            lambda: display_table(charges_data, rename_dict)
+        )
         
-        if profit_column:
-            total_company_profit = unique_daily[profit_column].sum()
-        elif 'Profit' in unique_daily.columns:
-            total_company_profit = unique_daily['Profit'].sum()
-    
-    # Create data for the chart
-    categories = ['Company']
-    investments = [company_total_investment]
-    profits = [total_company_profit]
-    
-    # Create figure
-    fig = go.Figure()
-    
-    # Add Investment bars (base)
-    fig.add_trace(go.Bar(
-        x=categories,
-        y=investments,
-        name='Total Company Investment',
-        marker_color='#1E88E5',  # Blue
-        opacity=0.8,
-        width=0.4,
-        offset=-0.2,  # Position to left
-        text=[f'₹{x:,.0f}' for x in investments],
-        textposition='auto',
-        hovertext=[
-            f"<b>Company</b><br>" +
-            f"Total Investment: ₹{inv:,.2f}<br>" +
-            f"Total Profit: ₹{profit:,.2f}<br>" +
-            f"ROI: {roi:.1f}%"
-            for inv, profit, roi in zip(
-                investments,
-                profits,
-                [(profit/inv*100) if inv > 0 else 0 for inv, profit in zip(investments, profits)]
-            )
-        ],
-        hoverinfo='text'
-    ))
-    
-    # Add Profit bars (on top)
-    profit_colors = ['#00C853' if profit >= 0 else '#FF5252' for profit in profits]
-    
-    fig.add_trace(go.Bar(
-        x=categories,
-        y=profits,
-        name='Total Company Profit',
-        marker_color=profit_colors,
-        opacity=0.8,
-        width=0.4,
-        offset=0.2,  # Position to right
-        text=[f'₹{x:,.0f}' for x in profits],
-        textposition='auto',
-        hovertext=[
-            f"<b>Company</b><br>" +
-            f"Total Investment: ₹{inv:,.2f}<br>" +
-            f"Total Profit: ₹{profit:,.2f}<br>" +
-            f"Status: {'Profit' if profit >= 0 else 'Loss'}<br>" +
-            f"ROI: {roi:.1f}%"
-            for inv, profit, roi in zip(
-                investments,
-                profits,
-                [(profit/inv*100) if inv > 0 else 0 for inv, profit in zip(investments, profits)]
-            )
-        ],
-        hoverinfo='text'
-    ))
-    
-    # Add connecting lines between bars
-    for i, (inv, profit) in enumerate(zip(investments, profits)):
-        # Add line from investment bar to profit bar
-        fig.add_shape(
-            type="line",
-            x0=i-0.1, x1=i+0.1,
-            y0=inv, y1=inv,
-            line=dict(color="rgba(255,255,255,0.3)", width=1),
+        st.dataframe(
+            display_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config=amount_column_config(currency_columns, symbol='₹')
         )
+        
+        # Show total pending amount
+        st.warning(f"**Total Pending Amount: {format_rupee(total_pending)}**")
+        
+        # Download button for platform charges data
+        export_download(data, 'platform_charges', metrics['user_id'], charges_data, "📥 Download Platform Charges Data",
+                        f"{metrics['user_id']}_platform_charges", "Platform Charges")
+    else:
+        st.success("✅ No platform charges found for your account!")
+
+@fragment
+@timed_function
+def additional_insights_section(data):
+    """Company-wide totals"""
+    # Additional Insights - With Light Red Heading
+    st.markdown('<div class="light-red-heading">📊 Additional Insights</div>', unsafe_allow_html=True)
     
-    # Update layout
-    fig.update_layout(
-        title='🏢 Company Total Investment vs Total Profit',
-        xaxis_title='',
-        yaxis_title='Amount (₹)',
-        barmode='group',
-        bargap=0.15,
-        bargroupgap=0.1,
-        hovermode='x unified',
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        template='plotly_dark',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font_color='white',
-        height=400,
-        margin=dict(l=50, r=50, t=80, b=50)
-    )
+    # Total company profit CORRECTLY (UNIQUE DAILY TOTALS, precomputed per data version)
+    total_company_profit = get_company_daily(data)['total_profit'].sum()
     
-    # Format y-axis with ₹ symbol
-    fig.update_yaxes(tickprefix='₹ ')
+    # Company total investment
+    investor_df = data.investors
+    company_total = investor_df['Total_Invested_Amount'].sum() if not investor_df.empty else 0
     
-    return fig
-
-def create_user_profit_table(user_id, data, selected_date=None, payment_status=None):
-    """Create filtered profit table for user"""
-    daily_report_df = data.get('Daily_Report', pd.DataFrame())
-    
-    if daily_report_df.empty:
-        return pd.DataFrame()
-    
-    # Filter for user
-    user_data = daily_report_df[daily_report_df['UserID'] == user_id].copy()
-    
-    # Try to find Total_Profit column with different variations
-    profit_column = None
-    possible_column_names = ['Total_Profit', 'Total Profit', 'TotalProfit', 'total_profit']
-    
-    for col in possible_column_names:
-        if col in user_data.columns:
-            profit_column = col
-            break
-    
-    # Make sure Total_Profit column exists (rename if found)
-    if profit_column and profit_column != 'Total_Profit':
-        user_data['Total_Profit'] = user_data[profit_column]
-    elif 'Profit' in user_data.columns and 'Total_Profit' not in user_data.columns:
-        # If only Profit column exists, use it as Total_Profit
-        user_data['Total_Profit'] = user_data['Profit']
-    
-    # Check if Remarks column exists - if not, create empty column
-    # This ensures the column appears even when empty
-    if 'Remarks' not in user_data.columns:
-        user_data['Remarks'] = ''
-    
-    # Apply date filter if selected
-    if selected_date:
-        if isinstance(selected_date, list) and len(selected_date) == 2:
-            start_date, end_date = selected_date
-            user_data = user_data[
-                (pd.to_datetime(user_data['Date']) >= pd.to_datetime(start_date)) &
-                (pd.to_datetime(user_data['Date']) <= pd.to_datetime(end_date))
-            ]
-        else:
-            user_data = user_data[pd.to_datetime(user_data['Date']) == pd.to_datetime(selected_date)]
+    # Display in 3 columns EXACTLY like the others
+    col1, col2, col3 = st.columns(3)
     
-    # Apply payment status filter
-    if payment_status and payment_status != 'All':
-        user_data = user_data[user_data['Payment'] == payment_status]
+    with col1:
+        st.metric("Total Company Investment", format_rupee(company_total))
     
-    # Sort by date
-    user_data = user_data.sort_values('Date', ascending=False)
+    with col2:
+        total_investors = len(investor_df)
+        st.metric("Total Investors", total_investors)
     
-    return user_data
+    with col3:
+        st.metric("Total Company Profit", format_rupee(total_company_profit))
+        # REMOVED: The calculation text as requested
+
+def overview_card_texts(metrics):
+    """Formatted values for the investment overview cards"""
+    return {
+        'total_investment': f"₹{int(metrics['total_investment']):,}",
+        'total_profit': format_rupee(metrics['total_profit']),
+        'roi': f"{metrics['roi']:.2f}%",
+        'expected_monthly': format_rupee(metrics['expected_monthly']),
+        'avg_daily_profit': f"₹{metrics['avg_daily_profit']:.2f}",
+    }
+
+@timed_function
+def investment_overview(data, metrics):
+    """Investment, profit, ROI and expected-profit cards"""
+    # Key Metrics in columns - With Light Red Heading
+    st.markdown('<div class="light-red-heading">📈 Investment Overview</div>', unsafe_allow_html=True)
+    
+    cards = cached_display(data, 'overview', metrics['user_id'], lambda: overview_card_texts(metrics))
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown(f"""
+        <div class='metric-card'>
+            <h4>Your Total Investment</h4>
+            <h2>{cards['total_investment']}</h2>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        profit_class = "profit-positive" if metrics['total_profit'] >= 0 else "profit-negative"
+        st.markdown(f"""
+        <div class='metric-card'>
+            <h4>Your Total Profit</h4>
+            <h2 class='{profit_class}'>{cards['total_profit']}</h2>
+            <small>(Including Tax)</small>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col3:
+        roi_class = "profit-positive" if metrics['roi'] >= 0 else "profit-negative"
+        st.markdown(f"""
+        <div class='metric-card'>
+            <h4>ROI</h4>
+            <h2 class='{roi_class}'>{cards['roi']}</h2>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col4:
+        st.markdown(f"""
+        <div class='metric-card'>
+            <h4>Expected Profit For Next 30 Days</h4>
+            <h2>{cards['expected_monthly']}</h2>
+            <small>Based on daily avg: {cards['avg_daily_profit']}</small>
+        </div>
+        """, unsafe_allow_html=True)
 
+@timed_function
+def investment_history_section(metrics):
+    """Main investment history table"""
+    # UPDATED: Changed section title from "Your Investment History" to "Your Main Investment History"
+    st.markdown('<div class="light-red-heading">💰 Your Main Investment History</div>', unsafe_allow_html=True)
+    if metrics['investment_history']:
+        invest_df = pd.DataFrame(metrics['investment_history'])
+        st.dataframe(
+            invest_df.rename(columns={
+                'date': 'Investment Date',
+                'amount': 'Amount (₹)',
+                'transaction_id': 'Transaction ID'
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.info("No investment history found.")
+
+def count_up_metric_html(label, value):
+    """Metric-style block whose value counts up in the browser before showing the exact amount"""
+    target = max(int(value), 0)
+    return f"""
+    <div class='count-up-metric'>
+        <div class='count-up-metric-label'>{label}</div>
+        <div class='count-up-metric-value' style='--count-up-target: {target};'>
+            <span class='count-up-final'>{format_rupee(value)}</span>
+        </div>
+    </div>
+    """
+
+def perf_panel_requested():
+    """Whether to show the performance panel (env var, or ?perf=1 on this visit)"""
+    if PERF_PANEL_ENABLED:
+        return True
+    query_params = getattr(st, 'query_params', None)
+    if query_params is not None:
+        return query_params.get(PERF_QUERY_PARAM) == "1"
+    # Streamlit < 1.30
+    return st.experimental_get_query_params().get(PERF_QUERY_PARAM, [None])[0] == "1"
+
+def performance_panel(data):
+    """Admin view: timing percentiles per section / data function, memory and cache stats"""
+    with st.expander("⏱️ Performance (admin)", expanded=True):
+        timing_log = get_timing_log()
+        st.caption(f"Last {len(timing_log)} timed calls across all sessions in this process")
+        st.dataframe(timing_log.summary().round(2), use_container_width=True)
+        
+        figure_cache = get_figure_cache()
+        lookups = figure_cache.hits + figure_cache.misses
+        hit_rate = figure_cache.hits / lookups * 100 if lookups else 0
+        st.caption(f"Figure cache: {len(figure_cache)} entries · {figure_cache.hits} hits / "
+                   f"{figure_cache.misses} misses ({hit_rate:.0f}% hit rate)")
+        
+        st.caption("Memory per table (as parsed → normalized)")
+        st.dataframe(data.memory_report().round(1), use_container_width=True)
+
+@timed_function
 def main():
     # SOLUTION 1: Using rem units
     st.markdown("""
@@ -964,12 +1311,16 @@ def main():
     
     # Add welcome animation
     welcome_text = "Welcome to QUANTUM PREDICTION"
-    display = st.empty()
-    for i in range(len(welcome_text) + 1):
-        display.markdown(f"<h3 style='text-align: center;'>{welcome_text[:i]}|</h3>", unsafe_allow_html=True)
-        time.sleep(0.05)
-    time.sleep(0.5)
-    display.empty()
+    if CLIENT_ANIMATIONS:
+        # Typed out and collapsed by CSS in the browser
+        st.markdown(f"<h3 class='typewriter-welcome'><span>{welcome_text}</span></h3>", unsafe_allow_html=True)
+    else:
+        display = st.empty()
+        for i in range(len(welcome_text) + 1):
+            display.markdown(f"<h3 style='text-align: center;'>{welcome_text[:i]}|</h3>", unsafe_allow_html=True)
+            time.sleep(0.05)
+        time.sleep(0.5)
+        display.empty()
     
     # Load data
     data = load_excel_data()
@@ -981,9 +1332,10 @@ def main():
     # Sidebar for login and filters
     with st.sidebar:
         st.header("🔐 User Login")
+        show_data_status()
         
         # Get all user IDs for dropdown
-        investor_df = data.get('Investor_Details', pd.DataFrame())
+        investor_df = data.investors
         if investor_df.empty:
             st.error("No investor data found.")
             st.stop()
@@ -1000,27 +1352,8 @@ def main():
                 if metrics:
                     # Success animation for login
                     st.success(f"✅ Welcome, {metrics['name']}!")
-                    time.sleep(0.5)
-                    
-                    # Date range filter
-                    st.header("📅 Filters")
-                    
-                    # Date range selector
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        start_date = st.date_input("Start Date", 
-                                                  value=datetime.now() - timedelta(days=30))
-                    with col2:
-                        end_date = st.date_input("End Date", 
-                                                value=datetime.now())
-                    
-                    date_range = [start_date, end_date]
-                    
-                    # Payment status filter
-                    payment_status = st.selectbox(
-                        "Payment Status:",
-                        ["All", "Completed", "Pending", "Recovered", "Re-Invest"]
-                    )
+                    if not CLIENT_ANIMATIONS:
+                        time.sleep(0.5)
                 else:
                     st.error("User not found in records.")
                     st.stop()
@@ -1097,12 +1430,12 @@ def main():
                         ⚠️ PLATFORM CHARGES PENDING!
                     </div>
                     <div class="pending-banner-message">
-                        You have <span class="highlight-text">₹{total_pending:,.2f}</span> in Platform Charges Pending Amount. 
+                        You have <span class="highlight-text">{format_rupee(total_pending)}</span> in Platform Charges Pending Amount. 
                         Please pay it at your earliest convenience. If you don't wish to pay? No problem. 
                         Just ignore this message. Charges can be adjusted into your daily profit.
                     </div>
                 </div>
-                <div class="pending-banner-amount">₹{total_pending:,.2f}</div>
+                <div class="pending-banner-amount">{format_rupee(total_pending)}</div>
             </div>
             """, unsafe_allow_html=True)
             
@@ -1115,331 +1448,21 @@ def main():
             
             st.markdown("---")  # Add a separator
         
-        # Key Metrics in columns - With Light Red Heading
-        st.markdown('<div class="light-red-heading">📈 Investment Overview</div>', unsafe_allow_html=True)
-        
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h4>Your Total Investment</h4>
-                <h2>₹{int(metrics['total_investment']):,}</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            profit_class = "profit-positive" if metrics['total_profit'] >= 0 else "profit-negative"
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h4>Your Total Profit</h4>
-                <h2 class='{profit_class}'>₹{metrics['total_profit']:,.2f}</h2>
-                <small>(Including Tax)</small>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            roi_class = "profit-positive" if metrics['roi'] >= 0 else "profit-negative"
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h4>ROI</h4>
-                <h2 class='{roi_class}'>{metrics['roi']:.2f}%</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
-            st.markdown(f"""
-            <div class='metric-card'>
-                <h4>Expected Profit For Next 30 Days</h4>
-                <h2>₹{metrics['expected_monthly']:,.2f}</h2>
-                <small>Based on daily avg: ₹{metrics['avg_daily_profit']:.2f}</small>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Investment vs Profit Chart - Candle Type Bars (NEW ADDITION)
-        st.markdown('<div class="light-red-heading">💹 Investment vs Profit Analysis</div>', unsafe_allow_html=True)
-        
-        # Add toggle for viewing all users vs current user only
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            view_option = st.radio(
-                "View:",
-                ["Your Data Only", "Compare with Other Investors"],
-                horizontal=True,
-                label_visibility="collapsed"
-            )
-        
-        # Create chart based on selection
-        chart_type = "current" if view_option == "Your Data Only" else "all"
-        profit_chart = create_investment_vs_profit_chart(
-            data, 
-            selected_user if view_option == "Your Data Only" else None
-        )
-        
-        if profit_chart:
-            # Wrap in transparent container
-            st.markdown("<div class='plotly-container'>", unsafe_allow_html=True)
-            st.plotly_chart(profit_chart, use_container_width=True)
-            st.markdown("</div>", unsafe_allow_html=True)
-            
-            # REMOVED: ROI insights section below the chart (as requested)
-            # Just show tip for comparison view
-            if view_option == "Compare with Other Investors":
-                st.info("💡 **Tip:** Compare your investment performance with other investors. Hover over bars to see detailed metrics.")
-        else:
-            st.info("No data available for the investment vs profit chart.")
-        
-        # Company Profit Trend and Company Investment vs Profit
-        st.markdown('<div class="light-red-heading">📊 Company Performance</div>', unsafe_allow_html=True)
-        
-        # Company Profit Graph
-        profit_fig = create_company_profit_graph(data)
-        if profit_fig:
-            # Wrap plotly chart in a transparent container
-            st.markdown("<div class='plotly-container'>", unsafe_allow_html=True)
-            st.plotly_chart(profit_fig, use_container_width=True)
-            st.markdown("</div>", unsafe_allow_html=True)
-        else:
-            st.info("No profit data available for graph.")
-        
-        # NEW: Company Investment vs Profit Candle Chart
-        company_chart = create_company_investment_vs_profit_chart(data)
-        if company_chart:
-            st.markdown("<div class='plotly-container'>", unsafe_allow_html=True)
-            st.plotly_chart(company_chart, use_container_width=True)
-            st.markdown("</div>", unsafe_allow_html=True)
-        else:
-            st.info("No data available for company investment vs profit chart.")
-        
-        # Filtered Data Table
-        st.markdown('<div class="light-red-heading">📋 Your Profit Details (Filtered Data)</div>', unsafe_allow_html=True)
-        
-        # Get filtered data
-        filtered_data = create_user_profit_table(
-            metrics['user_id'], 
-            data, 
-            date_range, 
-            payment_status
-        )
-        
-        if not filtered_data.empty:
-            # Display summary stats with animation
-            total_profit_filtered = filtered_data['Profit'].sum()
-            avg_daily_filtered = filtered_data['Profit'].mean()
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                # Animated counter for total profit
-                placeholder = st.empty()
-                for i in range(0, int(total_profit_filtered) + 1, max(1, int(total_profit_filtered/20))):
-                    placeholder.metric(f"Total Profit ({date_range[0]} to {date_range[1]})", 
-                                     f"₹{i:,.2f}")
-                    time.sleep(0.02)
-                placeholder.metric(f"Total Profit ({date_range[0]} to {date_range[1]})", 
-                                 f"₹{total_profit_filtered:,.2f}")
-            
-            with col2:
-                st.metric(f"Average Daily Profit", 
-                         f"₹{avg_daily_filtered:,.2f}")
-            
-            # Display the table with fade-in animation
-            st.markdown("<div class='fade-in'>", unsafe_allow_html=True)
-            
-            # Update display columns to include Total_Profit AND Remarks
-            display_cols = ['Date', 'Invest_Amount', 'Company_Total_Invest', 'Profit', 'Total_Profit', 'Payment', 'Remarks']
-            # Filter to only include columns that exist in the dataframe
-            display_cols = [col for col in display_cols if col in filtered_data.columns]
-            
-            # Simple dataframe display with Remarks column
-            st.dataframe(
-                filtered_data[display_cols].rename(columns={
-                    'Date': 'Date',
-                    'Invest_Amount': 'Your Investment (₹)',
-                    'Company_Total_Invest': 'Company Total Investment (₹)',
-                    'Profit': 'Your Profit With Tax(₹)',
-                    'Total_Profit': 'Company Profit (₹)',
-                    'Payment': 'Payment Status',
-                    'Remarks': 'Remarks - Complete Explanation about your Profit goes where and why it deducted'
-                }),
-                use_container_width=True,
-                hide_index=True
-            )
-            st.markdown("</div>", unsafe_allow_html=True)
-            
-            # Download button for filtered data
-            csv = filtered_data.to_csv(index=False)
-            st.download_button(
-                label="📥 Download Filtered Data",
-                data=csv,
-                file_name=f"{metrics['user_id']}_profit_data.csv",
-                mime="text/csv",
-            )
-        else:
-            st.info("No data found for the selected filters.")
-        
-        # UPDATED: Changed section title from "Your Investment History" to "Your Main Investment History"
-        st.markdown('<div class="light-red-heading">💰 Your Main Investment History</div>', unsafe_allow_html=True)
-        if metrics['investment_history']:
-            invest_df = pd.DataFrame(metrics['investment_history'])
-            st.dataframe(
-                invest_df.rename(columns={
-                    'date': 'Investment Date',
-                    'amount': 'Amount (₹)',
-                    'transaction_id': 'Transaction ID'
-                }),
-                use_container_width=True,
-                hide_index=True
-            )
-        else:
-            st.info("No investment history found.")
-        
-        # NEW SECTION: Re-Investment Details
-        st.markdown('<div class="light-red-heading">🔄 Your Re-Investment Details</div>', unsafe_allow_html=True)
-        
-        # Get re-investment data
-        reinvest_data = get_user_reinvestment_data(metrics['user_id'], data)
-        
-        if not reinvest_data.empty:
-            # Display the re-investment table
-            # Define column renaming for better display
-            column_rename = {
-                'Re-Invest_ID': 'Request ID',
-                'Requested_Amount': 'Requested Amount',
-                'Total_Added_Amount': 'Till Now Added Amount',
-                'Pending_Amount_To_Be_Add': 'Still Pending Amount To Add',
-                'Applied_To_Main_Investment_Status': 'Updated To Main Investment'
-            }
-            
-            # Only rename columns that exist in the data
-            rename_dict = {col: column_rename[col] for col in reinvest_data.columns if col in column_rename}
-            
-            # Format the display dataframe
-            display_df = reinvest_data.rename(columns=rename_dict)
-            
-            # Format currency columns with ₹ symbol
-            currency_columns = ['Requested Amount', 'Till Now Added Amount', 'Still Pending Amount To Add']
-            for col in currency_columns:
-                if col in display_df.columns:
-                    display_df[col] = display_df[col].apply(lambda x: f'₹{x:,.2f}' if pd.notna(x) else '₹0.00')
-            
-            st.dataframe(
-                display_df,
-                use_container_width=True,
-                hide_index=True
-            )
-            
-            # Download button for re-investment data (keep original format for download)
-            csv_reinvest = reinvest_data.to_csv(index=False)
-            st.download_button(
-                label="📥 Download Re-Investment Data",
-                data=csv_reinvest,
-                file_name=f"{metrics['user_id']}_reinvestment_data.csv",
-                mime="text/csv",
-            )
-        else:
-            st.info("No re-investment records found.")
-        
-        # UPDATED: Platform Charges Status - SIMPLE VERSION like Re-Investment
-        st.markdown('<div class="bright-red-heading">⚠️ Platform Charges Status</div>', unsafe_allow_html=True)
-        
-        # Check if popup should be shown for the first time (for users with pending)
-        if total_pending > 0 and 'popup_shown' not in st.session_state:
-            st.session_state.show_popup = True
-            st.session_state.popup_shown = True
-        
-        if not charges_data.empty:
-            # Display the platform charges table
-            # Define column renaming as specified
-            column_rename = {
-                'Charge_ID': 'Charge ID',
-                'Reason_For_Charge': 'Reason',
-                'Charge_Per_Head': 'Charge Per Person',
-                'Paid_Amt': 'Paid',
-                'Pending_Amt': 'Pending'
-            }
-            
-            # Only rename columns that exist in the data
-            rename_dict = {col: column_rename[col] for col in charges_data.columns if col in column_rename}
-            
-            # Format the display dataframe
-            display_df = charges_data.rename(columns=rename_dict)
-            
-            # Format currency columns with ₹ symbol
-            currency_columns = ['Charge Per Person', 'Paid', 'Pending']
-            for col in currency_columns:
-                if col in display_df.columns:
-                    display_df[col] = display_df[col].apply(lambda x: f'₹{x:,.2f}' if pd.notna(x) else '₹0.00')
-            
-            st.dataframe(
-                display_df,
-                use_container_width=True,
-                hide_index=True
-            )
-            
-            # Show total pending amount
-            st.warning(f"**Total Pending Amount: ₹{total_pending:,.2f}**")
-            
-            # Download button for platform charges data
-            csv_charges = charges_data.to_csv(index=False)
-            st.download_button(
-                label="📥 Download Platform Charges Data",
-                data=csv_charges,
-                file_name=f"{metrics['user_id']}_platform_charges.csv",
-                mime="text/csv",
-            )
-        else:
-            st.success("✅ No platform charges found for your account!")
+        investment_overview(data, metrics)
         
-        # Additional Insights - With Light Red Heading
-        st.markdown('<div class="light-red-heading">📊 Additional Insights</div>', unsafe_allow_html=True)
+        investment_vs_profit_section(data, selected_user)
         
-        # Get the Daily_Report data
-        daily_report_df = data.get('Daily_Report', pd.DataFrame())
-        
-        # Calculate total company profit CORRECTLY (UNIQUE DAILY TOTALS)
-        total_company_profit = 0
-        if not daily_report_df.empty:
-            # Ensure Date column is datetime
-            daily_report_df['Date'] = pd.to_datetime(daily_report_df['Date'])
-            
-            # Try to find Total_Profit column
-            profit_column = None
-            possible_column_names = ['Total_Profit', 'Total Profit', 'TotalProfit', 'total_profit']
-            
-            for col in possible_column_names:
-                if col in daily_report_df.columns:
-                    profit_column = col
-                    break
-            
-            if profit_column:
-                # Get unique daily Total_Profit values (take first entry per date)
-                unique_daily = daily_report_df.drop_duplicates(subset=['Date'], keep='first')
-                total_company_profit = unique_daily[profit_column].sum()
-            elif 'Profit' in daily_report_df.columns:
-                # Fallback: Group by Date and sum Profit column
-                daily_totals = daily_report_df.groupby('Date')['Profit'].sum().reset_index()
-                total_company_profit = daily_totals['Profit'].sum()
-            else:
-                total_company_profit = 0
-        else:
-            total_company_profit = 0
+        company_performance_section(data)
         
-        # Company total investment
-        company_total = investor_df['Total_Invested_Amount'].sum() if not investor_df.empty else 0
+        profit_details_section(data, metrics)
         
-        # Display in 3 columns EXACTLY like the others
-        col1, col2, col3 = st.columns(3)
+        investment_history_section(metrics)
         
-        with col1:
-            st.metric("Total Company Investment", f"₹{company_total:,.2f}")
+        reinvestment_section(data, metrics)
         
-        with col2:
-            total_investors = len(investor_df)
-            st.metric("Total Investors", total_investors)
+        platform_charges_section(data, metrics, charges_data, total_pending)
         
-        with col3:
-            st.metric("Total Company Profit", f"₹{total_company_profit:,.2f}")
-            # REMOVED: The calculation text as requested
+        additional_insights_section(data)
     
     else:
         st.error("Could not load user metrics. Please try again.")
@@ -1459,6 +1482,22 @@ def main():
         </div>
     </div>
     """, unsafe_allow_html=True)
+    
+    if perf_panel_requested():
+        performance_panel(data)
+
+def run_with_data_checks():
+    """Run the dashboard and fail loudly if the run modified the shared data"""
+    try:
+        main()
+    finally:
+        data = get_data_refresher().current
+        modified = data.modified_tables() if data is not None else []
+        if modified:
+            raise RuntimeError(f"Shared investment data was modified during the run: {', '.join(modified)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if STRICT_DATA_CHECKS:
+        run_with_data_checks()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,294 @@
+"""Synthetic investment workbooks with the dashboard's sheet layout, at any size
+
+    python benchmarks/generate_workbook.py synthetic.xlsx --investors 1000 --years 1
+
+Writes Investor_Details, Daily_Profits_Calculations, Daily_Report, Loss_Recovery,
+Platofrm_Maintaince_Charges, Rough Sheet and Re_Investment_Details with the same columns
+(and blank rows between days) as INVESTMENT_APP_DETAILS_UPDATE.xlsx. Investors join over
+the first part of the period and top up now and then, the company has occasional loss
+days, and Daily_Report is derived from the calculations sheet by profit_allocation.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import openpyxl
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import profit_allocation
+
+# Excel sheets hold at most this many rows, header included
+EXCEL_MAX_ROWS = 1048576
+DEFAULT_START_DATE = "2024-01-01"
+
+FIRST_NAMES = ['Arun', 'Balaram', 'Chinni', 'Divya', 'Eswar', 'Farhan', 'Gita', 'Hari', 'Imran', 'Jaya',
+               'Kiran', 'Lakshmi', 'Mohan', 'Nisha', 'Omkar', 'Priya', 'Ravi', 'Sana', 'Teja', 'Usha']
+LAST_NAMES = ['Kumar', 'Reddy', 'Sharma', 'Rao', 'Khan', 'Iyer', 'Nair', 'Das', 'Patel', 'Singh']
+CONTACT_GROUPS = ['Myself', 'Grp Mem', 'Referral', 'Vending Machine Referer']
+CHARGE_REASONS = [('KYC', 'KYC Recharge Charges For VPS'), ('VPS', 'VPS Renewal Charges'),
+                  ('API', 'Broker API Subscription')]
+PAYOUT_RATIOS = [1.0, 0.94, 0.9, 0.75]
+PAYOUT_WEIGHTS = [0.7, 0.15, 0.1, 0.05]
+REINVEST_REMARK = "Profit is moved to Re-Investment Section (Re-Invest_ID)"
+
+def user_ids_for(count):
+    """U001, U002, ... (wider when there are more than 999 investors)"""
+    width = max(3, len(str(count)))
+    return np.array([f"U{i:0{width}d}" for i in range(1, count + 1)])
+
+def simulate(investors, days, seed, start_date=DEFAULT_START_DATE):
+    """Deposits, company profits and payout settings for a synthetic history"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start_date, periods=days, freq='D').values
+    user_ids = user_ids_for(investors)
+
+    # Everyone joins in the first 60% of the period (the first investor on day one), then tops up
+    join_day = rng.integers(0, max(1, int(days * 0.6)), size=investors)
+    join_day[0] = 0
+    top_ups = rng.poisson(days / 120, size=investors)
+    deposit_users = np.concatenate([np.arange(investors), np.repeat(np.arange(investors), top_ups)])
+    deposit_days = np.concatenate([
+        join_day,
+        (np.repeat(join_day, top_ups) + rng.random(top_ups.sum()) * (days - np.repeat(join_day, top_ups))).astype(int)
+    ])
+    deposit_amounts = np.concatenate([
+        rng.choice([500, 1000, 1500, 2000, 2500, 5000], size=investors),
+        rng.choice([100, 200, 300, 500, 1000], size=top_ups.sum())
+    ]).astype(float)
+    order = np.lexsort((deposit_users, deposit_days))
+    deposits = pd.DataFrame({
+        'user': deposit_users[order],
+        'day': deposit_days[order],
+        'amount': deposit_amounts[order],
+    })
+
+    balances = profit_allocation.balance_matrix(
+        np.arange(investors), np.arange(days), deposits['user'], deposits['day'], deposits['amount'])
+    # Whole-rupee company profit of about 4% a day, with the odd loss day
+    total_profit = np.round(balances.sum(axis=0) * rng.normal(0.04, 0.03, size=days))
+    payout = np.asarray(PAYOUT_RATIOS)[rng.choice(len(PAYOUT_RATIOS), size=investors, p=PAYOUT_WEIGHTS)]
+
+    return {
+        'rng': rng,
+        'dates': dates,
+        'user_ids': user_ids,
+        'deposits': deposits,
+        'balances': balances,
+        'total_profit': total_profit,
+        'payout_ratio': np.broadcast_to(payout[:, None], balances.shape),
+    }
+
+def calculation_rows(sim):
+    """Daily_Profits_Calculations plus the re-investment bookkeeping that goes with it"""
+    rng, dates, user_ids = sim['rng'], sim['dates'], sim['user_ids']
+    balances, total_profit = sim['balances'], sim['total_profit']
+    allocation = profit_allocation.allocate_profits(balances, total_profit, sim['payout_ratio'])
+    investors, days = balances.shape
+
+    status = np.full(balances.shape, 'Completed', dtype=object)
+    status[:, -2:] = 'Pending'
+    status[:, total_profit < 0] = 'Recovered'
+
+    # A few investors move their payouts into a re-investment until the requested amount is covered
+    reinvest_rows = []
+    report_notes = np.full(balances.shape, None, dtype=object)
+    for user in rng.choice(investors, size=max(1, investors // 20), replace=False):
+        start = int(rng.integers(days // 2, days))
+        requested = float(rng.choice([300, 500, 1000]))
+        payouts = np.where(status[user, start:] == 'Completed', allocation['profit'][user, start:], 0.0)
+        covered = np.cumsum(payouts)
+        end = start + int(np.searchsorted(covered, requested)) + 1
+        mask = status[user, start:end] == 'Completed'
+        status[user, start:end][mask] = 'Re-Invest'
+        report_notes[user, start:end][mask] = f"R001{user_ids[user]}"
+        added = float(min(covered[-1], requested)) if len(covered) else 0.0
+        reinvest_rows.append({
+            'UserID': user_ids[user],
+            'Requested_Amount': requested,
+            'Re-Invest_ID': f"R001{user_ids[user]}",
+            'Total_Added_Amount': added,
+            'Pending_Amount_To_Be_Add': requested - added,
+            'Applied_To_Main_Investment_Status': 'Applied' if added >= requested else 'Not-Yet',
+        })
+
+    cols, rows = np.nonzero((balances > 0).T)
+    deposits = sim['deposits']
+    deposit_key = deposits['user'].to_numpy() * days + deposits['day'].to_numpy()
+    deposit_at = pd.Series(np.arange(len(deposits)), index=deposit_key)
+    deposit_at = deposit_at[~deposit_at.index.duplicated(keep='last')]
+    matched = deposit_at.reindex(rows * days + cols).to_numpy()
+    has_deposit = ~np.isnan(matched)
+    deposit_index = matched[has_deposit].astype(int)
+    # Several top-ups on one day are recorded as one transaction
+    day_total = deposits.groupby(['user', 'day'])['amount'].sum()
+
+    amount = np.full(len(rows), np.nan)
+    amount[has_deposit] = day_total.reindex(
+        pd.MultiIndex.from_arrays([rows[has_deposit], cols[has_deposit]])).to_numpy()
+    transaction_id = np.full(len(rows), None, dtype=object)
+    transaction_id[has_deposit] = [f"T{i + 1:06d}ADD{a:.0f}" for i, a in zip(deposit_index, amount[has_deposit])]
+    transaction_date = np.full(len(rows), None, dtype=object)
+    transaction_date[has_deposit] = pd.to_datetime(dates[cols[has_deposit]]) - pd.Timedelta(days=1)
+
+    names = investor_names(user_ids, rng)
+    calculations = pd.DataFrame({
+        'Date': dates[cols],
+        'UserID': user_ids[rows],
+        'Name': names['Name'].to_numpy()[rows],
+        'User_Invested_Amount': amount,
+        'Transaction_ID': transaction_id,
+        'Transaction_Date': transaction_date,
+        'User_Invest_Amount_As_On_Date': balances[rows, cols],
+        'Company_Total_Investment_As_On_Date': allocation['company_total'][cols],
+        'Total_Profit': total_profit[cols],
+        'Profit_%': allocation['share'][rows, cols],
+        'Profit_Without_Tax': allocation['share'][rows, cols] * total_profit[cols],
+        'Payment_Status': status[rows, cols],
+        'Tax_Deduction_%': sim['payout_ratio'][rows, cols],
+        'Profit_With_Tax': allocation['profit'][rows, cols],
+    })
+
+    noted = report_notes[rows, cols] != None  # noqa: E711 - elementwise on an object array
+    notes = pd.DataFrame({
+        'Date': dates[cols][noted],
+        'UserID': user_ids[rows][noted],
+        'Re-Invest_ID': report_notes[rows, cols][noted],
+        'Remarks': REINVEST_REMARK,
+    })
+    return calculations, notes, pd.DataFrame(reinvest_rows), names
+
+def investor_names(user_ids, rng):
+    """Name, contact and UPI columns for every investor"""
+    first = rng.choice(FIRST_NAMES, size=len(user_ids))
+    last = rng.choice(LAST_NAMES, size=len(user_ids))
+    names = pd.Series(first, dtype=object) + ' ' + pd.Series(last, dtype=object)
+    groups = rng.choice(CONTACT_GROUPS, size=len(user_ids))
+    return pd.DataFrame({
+        'UserID': user_ids,
+        'Contact_Name': np.where(groups == 'Grp Mem', 'Grp Mem ' + first, groups),
+        'Name': names.to_numpy(),
+        'UPI': [f"{f.lower()}.{i}@okaxis" for i, f in enumerate(first, start=1)],
+    })
+
+def investor_details(sim, names, report):
+    """Investor_Details with totals that agree with the other sheets"""
+    invested = sim['balances'][:, -1]
+    earned = report.groupby('UserID')['Profit'].sum().reindex(sim['user_ids']).fillna(0).to_numpy()
+    return pd.DataFrame({
+        'UserID': sim['user_ids'],
+        'Contact_Name': names['Contact_Name'],
+        'Name': names['Name'],
+        'Total_Invested_Amount': invested,
+        'Total Profit Earned': earned,
+        'UPI': names['UPI'],
+        'Difference_Investment_Profit': earned - invested,
+    })
+
+def platform_charges(sim):
+    """A platform charge every ~90 days, split across the investors active that day"""
+    rng, balances = sim['rng'], sim['balances']
+    days = balances.shape[1]
+    charges = []
+    for k, day in enumerate(range(min(30, days - 1), days, 90)):
+        active = np.flatnonzero(balances[:, day] > 0)
+        prefix, reason = CHARGE_REASONS[k % len(CHARGE_REASONS)]
+        amount = float(rng.choice([150, 220, 300, 500]))
+        per_head = round(amount / len(active), 2)
+        paid = np.where(rng.random(len(active)) < 0.9, per_head, 0.0)
+        charges.append(pd.DataFrame({
+            'UserID': sim['user_ids'][active],
+            'Reason_For_Charge': reason,
+            'Charge_Amt': amount,
+            'Charge_Per_Head': per_head,
+            'Paid_Amt': paid,
+            'Pending_Amt': per_head - paid,
+            'Charge_ID': f"{prefix}{1001 + k}",
+        }))
+    if not charges:
+        return pd.DataFrame(columns=['UserID', 'Reason_For_Charge', 'Charge_Amt', 'Charge_Per_Head',
+                                     'Paid_Amt', 'Pending_Amt', 'Charge_ID'])
+    return pd.concat(charges, ignore_index=True)
+
+def loss_recovery(sim):
+    """Loss days and their company result"""
+    losses = sim['total_profit'] < 0
+    return pd.DataFrame({'Date': sim['dates'][losses], 'Total Profit': sim['total_profit'][losses]})
+
+def sheet_rows(df):
+    """Rows of plain Python values (NaN/NaT as empty cells) for openpyxl"""
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            values = np.array(series.dt.to_pydatetime(), dtype=object)
+        else:
+            values = series.to_numpy(dtype=object)
+        values[pd.isna(series).to_numpy()] = None
+        columns.append(values.tolist())
+    return zip(*columns)
+
+def estimated_rows(balances):
+    """Rows the calculations sheet will need (one per funded investor-day, a blank row per day, the header)"""
+    return int((balances > 0).sum()) + balances.shape[1] + 1
+
+def generate_workbook(path, investors=10, years=1.0, seed=0, start_date=DEFAULT_START_DATE):
+    """Write a synthetic workbook and return its row counts per sheet"""
+    days = max(2, int(round(years * 365)))
+    sim = simulate(investors, days, seed, start_date)
+    needed = estimated_rows(sim['balances'])
+    if needed > EXCEL_MAX_ROWS:
+        raise ValueError(f"{investors} investors x {days} days needs {needed:,} rows per daily sheet, "
+                         f"more than Excel's {EXCEL_MAX_ROWS:,}; use fewer investors or a shorter period")
+
+    calculations, notes, reinvestments, names = calculation_rows(sim)
+    report = profit_allocation.build_daily_report(calculations, previous_report=notes)
+
+    sheets = {
+        'Daily_Profits_Calculations': profit_allocation.with_day_separators(calculations),
+        'Investor_Details': investor_details(sim, names, report),
+        profit_allocation.REPORT_SHEET: profit_allocation.with_day_separators(report),
+        'Loss_Recovery': loss_recovery(sim),
+        'Platofrm_Maintaince_Charges': platform_charges(sim),
+        'Rough Sheet': pd.DataFrame(),
+        'Re_Investment_Details': reinvestments,
+    }
+
+    # Streamed write-only workbook - the normal openpyxl writer keeps every cell in memory
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        if len(df.columns):
+            worksheet.append(list(df.columns))
+        for row in sheet_rows(df):
+            worksheet.append(row)
+    workbook.save(path)
+    return {sheet_name: len(df) for sheet_name, df in sheets.items()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic investment workbook")
+    parser.add_argument("output", help="xlsx file to write")
+    parser.add_argument("--investors", type=int, default=10)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-date", default=DEFAULT_START_DATE)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        rows = generate_workbook(args.output, args.investors, args.years, args.seed, args.start_date)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    print(f"Wrote {args.output} in {time.perf_counter() - started:.1f}s")
+    for sheet_name, count in rows.items():
+        print(f"  {sheet_name:<30} {count:>9,} rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""Load test: drive many dashboard sessions at once in one process with Streamlit's AppTest
+
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --sessions 1,4,16 --iterations 10
+    DASHBOARD_ANIMATION_MODE=server python benchmarks/load_test.py --sessions 8
+
+Every simulated session is its own AppTest (its own session state and widgets), run on its
+own thread against the same app module caches, the way one Streamlit server shares them.
+Each session opens the dashboard and then, for --iterations rounds, does what an investor
+does: picks a user, moves the profit table's date filter and flips the investment vs profit
+chart to "Compare with Other Investors" and back.
+
+The workbook is read from the bundled file (or --workbook) through a file:// URL with a
+throwaway cache directory, so no network is needed. One warm-up session loads the data
+before timing starts. For every session count the run reports throughput, latency
+percentiles per action and the peak resident memory of the process.
+
+Needs Streamlit 1.29 or newer (see MIN_STREAMLIT_VERSION); share_app_test_state lists the
+AppTest internals it depends on.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import platform
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# `streamlit run` puts the app's directory on sys.path for its imports; older AppTest doesn't
+sys.path.insert(0, REPO_DIR)
+BENCHMARK_DIR = os.path.join(REPO_DIR, "benchmarks")
+APP_PATH = os.path.join(REPO_DIR, "app.py")
+DEFAULT_WORKBOOK = os.path.join(REPO_DIR, "INVESTMENT_APP_DETAILS_UPDATE.xlsx")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+DEFAULT_SESSIONS = "1,4,16"
+RUN_TIMEOUT_SECONDS = 300
+MEMORY_SAMPLE_SECONDS = 0.05
+COMPARE_OPTION = "Compare with Other Investors"
+OWN_DATA_OPTION = "Your Data Only"
+ACTIONS = ['open', 'select_user', 'date_filter', 'compare_on', 'compare_off']
+# AppTest came in 1.28, but its first release can't parse the st.empty().container() the first
+# page load uses (checked against 1.29 and 1.66)
+MIN_STREAMLIT_VERSION = (1, 29)
+
+def current_rss_bytes():
+    """Resident memory of this process right now (None where /proc is not available)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def peak_rss_bytes():
+    """Highest resident memory of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class MemorySampler:
+    """Background thread tracking peak RSS while one load level runs"""
+
+    def __init__(self, interval=MEMORY_SAMPLE_SECONDS):
+        self.interval = interval
+        self.peak = current_rss_bytes() or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss_bytes()
+            if rss is not None:
+                self.peak = max(self.peak, rss)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if current_rss_bytes() is None:
+            # No /proc: fall back to the process-wide high-water mark
+            self.peak = peak_rss_bytes()
+
+def streamlit_version():
+    """Installed Streamlit version as a tuple of ints, e.g. (1, 28, 0)"""
+    import streamlit
+    return tuple(int(part) for part in re.findall(r"\d+", streamlit.__version__)[:3])
+
+def share_app_test_state():
+    """Let AppTest runs overlap on several threads
+
+    AppTest assumes one run at a time. Every run installs a fresh mock Runtime (and from
+    Streamlit 1.33 patches the global.appTest option), then puts both back at the end,
+    pulling them out from under any other session still running. It also compiles the script
+    again from scratch, which can fail inside CPython's AST code when two threads do it at
+    once. Like a real server, all sessions here share one runtime and one compiled copy of
+    app.py instead.
+
+    This reaches into AppTest's internals: the Runtime and ScriptCache names its modules
+    import. Both are there from Streamlit 1.28 through the versions this was last run with;
+    older versions, or newer ones without them, stop here with an error instead of failing
+    halfway through a run.
+    """
+    import streamlit
+    if streamlit_version() < MIN_STREAMLIT_VERSION:
+        raise SystemExit(f"load_test.py needs Streamlit >= {'.'.join(map(str, MIN_STREAMLIT_VERSION))} "
+                         f"(AppTest), found {streamlit.__version__}")
+
+    from unittest.mock import MagicMock
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    missing = [f"{module.__name__}.{name}" for module, name in
+               [(app_test, 'Runtime'), (local_script_runner, 'ScriptCache')] if not hasattr(module, name)]
+    if missing:
+        raise SystemExit(f"load_test.py can't share state between AppTest runs on Streamlit "
+                         f"{streamlit.__version__}: {', '.join(missing)} not found")
+
+    try:
+        config.get_option("global.appTest")
+    except RuntimeError:
+        pass  # Before 1.33 AppTest leaves the config alone between runs
+    else:
+        # Restoring the option after each run then restores it to True
+        config.set_option("global.appTest", True)
+
+    shared_runtime = MagicMock(spec=Runtime)
+    shared_runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared_runtime.cache_storage_manager = MemoryCacheStorageManager()
+    try:
+        # Newer AppTest runtimes also carry a dataframe source manager
+        from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+        shared_runtime.dataframe_source_mgr = DataframeSourceManager()
+    except ImportError:
+        pass
+    Runtime._instance = shared_runtime
+
+    # AppTest sets and clears _instance on the class it imported; give it a subclass so
+    # those writes land there and Runtime.instance() keeps returning the shared runtime
+    class PerRunRuntime(Runtime):
+        pass
+    app_test.Runtime = PerRunRuntime
+
+    # LocalScriptRunner builds its ScriptCache by name (so does AppTest from 1.45)
+    shared_script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: shared_script_cache
+
+def widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"no widget labelled {label!r} on the page")
+
+class Session:
+    """One simulated investor: an AppTest plus the latencies of everything it did"""
+
+    def __init__(self, index, seed):
+        from streamlit.testing.v1 import AppTest
+        self.index = index
+        self.random = random.Random(seed * 1000 + index)
+        self.app = AppTest.from_file(APP_PATH, default_timeout=RUN_TIMEOUT_SECONDS)
+        self.latencies = {action: [] for action in ACTIONS}
+        self.errors = []
+
+    def step(self, action, change):
+        """Apply one widget change (None for the first page load) and time the rerun"""
+        started = time.perf_counter()
+        try:
+            element = change() if change else self.app
+            element.run()
+        except Exception as e:
+            self.errors.append(f"{action}: {type(e).__name__}: {e}")
+            return
+        self.latencies[action].append(time.perf_counter() - started)
+        if self.app.exception:
+            self.errors.append(f"{action}: {self.app.exception[0].value}")
+
+    def pick_user(self):
+        users = widget(self.app.selectbox, "Select your User ID:")
+        return users.select(self.random.choice(users.options))
+
+    def move_dates(self):
+        end = date.today() - timedelta(days=self.random.randint(0, 60))
+        start = end - timedelta(days=self.random.choice([7, 30, 90, 365]))
+        widget(self.app.date_input, "End Date").set_value(end)
+        return widget(self.app.date_input, "Start Date").set_value(start)
+
+    def compare_view(self, option):
+        for radio in self.app.radio:
+            if COMPARE_OPTION in radio.options:
+                return radio.set_value(option)
+        raise LookupError("no comparison toggle on the page")
+
+    def run(self, iterations):
+        self.step('open', None)
+        for _ in range(iterations):
+            if self.errors:
+                return
+            self.step('select_user', self.pick_user)
+            self.step('date_filter', self.move_dates)
+            self.step('compare_on', lambda: self.compare_view(COMPARE_OPTION))
+            self.step('compare_off', lambda: self.compare_view(OWN_DATA_OPTION))
+
+def percentile(samples, q):
+    """Linear-interpolated percentile of a non-empty list"""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def latency_summary(samples):
+    if not samples:
+        return None
+    return {
+        'count': len(samples),
+        'p50_ms': percentile(samples, 50) * 1e3,
+        'p95_ms': percentile(samples, 95) * 1e3,
+        'p99_ms': percentile(samples, 99) * 1e3,
+        'max_ms': max(samples) * 1e3,
+        'mean_ms': statistics.fmean(samples) * 1e3,
+    }
+
+def run_level(sessions, iterations, seed):
+    """Run `sessions` concurrent sessions and summarise them"""
+    players = [Session(i, seed) for i in range(sessions)]
+    threads = [threading.Thread(target=p.run, args=(iterations,), name=f"session-{p.index}") for p in players]
+
+    with MemorySampler() as memory:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    by_action = {action: [s for p in players for s in p.latencies[action]] for action in ACTIONS}
+    everything = [s for samples in by_action.values() for s in samples]
+    return {
+        'sessions': sessions,
+        'iterations': iterations,
+        'elapsed_s': elapsed,
+        'reruns': len(everything),
+        'throughput_rps': len(everything) / elapsed if elapsed else 0.0,
+        'latency': latency_summary(everything),
+        'latency_by_action': {action: latency_summary(samples) for action, samples in by_action.items()},
+        'peak_rss_mb': memory.peak / 2 ** 20,
+        'errors': [error for p in players for error in p.errors],
+    }
+
+def print_level(result):
+    overall = result['latency'] or {}
+    print(f"\n{result['sessions']} concurrent session(s): {result['reruns']} reruns in {result['elapsed_s']:.1f} s "
+          f"= {result['throughput_rps']:.1f} reruns/s, peak RSS {result['peak_rss_mb']:.0f} MB")
+    print(f"  {'action':<14} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    rows = list(result['latency_by_action'].items()) + [('all', overall)]
+    for action, stats in rows:
+        if not stats:
+            continue
+        print(f"  {action:<14} {stats['count']:>6} {stats['p50_ms']:>7.0f}ms {stats['p95_ms']:>7.0f}ms "
+              f"{stats['p99_ms']:>7.0f}ms {stats['max_ms']:>7.0f}ms")
+    for error in result['errors'][:5]:
+        print(f"  error: {error}")
+    if len(result['errors']) > 5:
+        print(f"  ... {len(result['errors']) - 5} more error(s)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive concurrent dashboard sessions and measure latency")
+    parser.add_argument("--sessions", default=DEFAULT_SESSIONS,
+                        help="comma-separated concurrent session counts, run one after another")
+    parser.add_argument("--iterations", type=int, default=5, help="interaction rounds per session")
+    parser.add_argument("--workbook", default=DEFAULT_WORKBOOK)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    args = parser.parse_args(argv)
+
+    levels = [int(n) for n in args.sessions.split(',')]
+    share_app_test_state()
+    from streamlit import logger
+    # Otherwise every rerun of every session repeats the app's deprecation warnings
+    logger.set_log_level("error")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # The app reads these when each session executes it, so they must be set first
+        os.environ['INVESTMENT_EXCEL_URL'] = pathlib.Path(os.path.abspath(args.workbook)).as_uri()
+        os.environ['INVESTMENT_DATA_CACHE_DIR'] = cache_dir
+
+        print("Warm-up session (loads and caches the workbook)...")
+        warmup = Session(0, args.seed)
+        started = time.perf_counter()
+        warmup.step('open', None)
+        print(f"  first page load {time.perf_counter() - started:.1f} s")
+        if warmup.errors:
+            print(f"  error: {warmup.errors[0]}")
+            return 1
+
+        results = []
+        for sessions in levels:
+            print(f"Running {sessions} concurrent session(s) x {args.iterations} round(s)...")
+            results.append(run_level(sessions, args.iterations, args.seed))
+
+    run = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'workbook': os.path.basename(args.workbook),
+        'animation_mode': os.environ.get("DASHBOARD_ANIMATION_MODE", "client"),
+        'query_backend': os.environ.get("DASHBOARD_QUERY_BACKEND", "pandas"),
+        'results': results,
+    }
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, "load-" + datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2)
+
+    for result in results:
+        print_level(result)
+    print(f"\nResults written to {path}")
+    return 1 if any(result['errors'] for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
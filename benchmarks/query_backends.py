@@ -0,0 +1,99 @@
+"""Compare the pandas and SQLite query backends on the same dataset
+
+    python benchmarks/query_backends.py
+    python benchmarks/query_backends.py --workbook big.xlsx --repeat 20
+
+Loads one workbook version, then times every user's profit table (unfiltered, last 30
+days, and by payment status), the re-investment and charges lookups and the company
+aggregates on both backends. Every result is checked against the pandas path first.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+import pandas as pd
+
+import investment_data
+
+BACKENDS = ['pandas', 'sqlite']
+
+def time_calls(func, calls, repeat):
+    """Median seconds per call of func(*args) over `repeat` passes through `calls`"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for args in calls:
+            func(*args)
+        samples.append((time.perf_counter() - started) / max(len(calls), 1))
+    return statistics.median(samples)
+
+def run_with_backend(backend, func, *args):
+    investment_data.QUERY_BACKEND = backend
+    return func(*args)
+
+def benchmark_cases(data):
+    """(name, function, list of argument tuples) for every query the dashboard makes"""
+    users = list(data.user_index('daily_report'))
+    last_date = data.daily_report['Date'].max()
+    last_30_days = [(last_date - pd.Timedelta(days=30)).date(), last_date.date()]
+    return [
+        ("profit table", investment_data.create_user_profit_table, [(user, data) for user in users]),
+        ("profit table, last 30 days", investment_data.create_user_profit_table,
+         [(user, data, last_30_days) for user in users]),
+        ("profit table, Completed", investment_data.create_user_profit_table,
+         [(user, data, None, 'Completed') for user in users]),
+        ("re-investments", investment_data.get_user_reinvestment_data, [(user, data) for user in users]),
+        ("platform charges", investment_data.get_user_platform_charges_data,
+         [(user, data) for user in users]),
+        ("company aggregates", investment_data.build_company_daily, [(data,)]),
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pandas and SQLite query backends")
+    parser.add_argument("--workbook", default=investment_data.BUNDLED_EXCEL_PATH, help="workbook to load")
+    parser.add_argument("--repeat", type=int, default=10, help="passes over every case")
+    args = parser.parse_args(argv)
+    
+    started = time.perf_counter()
+    data = investment_data.open_dataset(args.workbook, investment_data.file_content_hash(args.workbook))
+    investment_data.warm_dataset(data)
+    print(f"Loaded {args.workbook} in {time.perf_counter() - started:.2f}s "
+          f"({len(data.daily_report)} Daily_Report rows, {len(data.user_index('daily_report'))} users)")
+    
+    started = time.perf_counter()
+    investment_data.SQLiteStore(data)
+    print(f"SQLite store built in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+    investment_data.QUERY_BACKEND = 'sqlite'
+    investment_data.get_query_store(data)
+    
+    print(f"{'case':<28} {'pandas':>12} {'sqlite':>12} {'speedup':>9}")
+    mismatches = 0
+    for name, func, calls in benchmark_cases(data):
+        # Both backends have to agree before their timings mean anything
+        for call in calls:
+            expected = run_with_backend('pandas', func, *call)
+            actual = run_with_backend('sqlite', func, *call)
+            try:
+                pd.testing.assert_frame_equal(expected, actual, check_exact=False, rtol=1e-9)
+            except AssertionError:
+                mismatches += 1
+        
+        timings = {}
+        for backend in BACKENDS:
+            investment_data.QUERY_BACKEND = backend
+            timings[backend] = time_calls(func, calls, args.repeat)
+        print(f"{name:<28} {timings['pandas'] * 1e6:>9.0f} us {timings['sqlite'] * 1e6:>9.0f} us "
+              f"{timings['pandas'] / timings['sqlite']:>8.2f}x")
+    
+    if mismatches:
+        print(f"\n{mismatches} call(s) returned different results on the two backends")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
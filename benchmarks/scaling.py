@@ -0,0 +1,199 @@
+"""Scaling benchmark: time the dashboard's data functions on synthetic workbooks of growing size
+
+    python benchmarks/scaling.py
+    python benchmarks/scaling.py --sizes 10x1,1000x1 --compare benchmarks/results/<earlier run>.json
+
+For every size (investors x years) a workbook is generated once (cached under
+benchmarks/.workbooks) and then timed:
+
+  load_excel_data (cold)      first load in a fresh process: fetch, parse the xlsx, build
+                              everything (what load_excel_data runs before anything is cached)
+  load_excel_data (snapshot)  the same with the Feather snapshots from the cold load on disk
+  calculate_user_metrics, create_user_profit_table (all rows / last 30 days)
+                              median per call over a sample of users
+  create_company_profit_graph, create_investment_vs_profit_chart,
+  create_investor_comparison_chart, create_company_investment_vs_profit_chart
+                              median per build, bypassing the figure cache
+
+Each run is written to benchmarks/results/<timestamp>.json. With --compare, every timing is
+also shown next to the same timing from an earlier results file.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DIR = os.path.join(REPO_DIR, "benchmarks")
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+import numpy as np
+import pandas as pd
+
+import investment_charts
+import investment_data
+from generate_workbook import generate_workbook
+
+# 10k investors only fit in a sheet for about three months (Excel's row limit)
+DEFAULT_SIZES = "10x1,10x5,100x1,1000x1,10000x0.25"
+WORKBOOK_DIR = os.path.join(BENCHMARK_DIR, ".workbooks")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+SAMPLE_USERS = 20
+
+def parse_sizes(text):
+    """'10x1,1000x0.5' -> [(10, 1.0), (1000, 0.5)]"""
+    sizes = []
+    for item in text.split(','):
+        investors, years = item.lower().split('x')
+        sizes.append((int(investors), float(years)))
+    return sizes
+
+def workbook_for(investors, years, seed):
+    """Path of the synthetic workbook for a size, generating it on first use"""
+    os.makedirs(WORKBOOK_DIR, exist_ok=True)
+    path = os.path.join(WORKBOOK_DIR, f"synthetic_{investors}x{years:g}y_seed{seed}.xlsx")
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        generate_workbook(path + ".tmp.xlsx", investors, years, seed)
+        os.replace(path + ".tmp.xlsx", path)
+        print(f"  generated {os.path.basename(path)} in {time.perf_counter() - started:.0f}s")
+    return path
+
+def median_time(func, calls, repeat):
+    """Median seconds per call over `repeat` rounds of `calls` (a list of argument tuples)"""
+    samples = []
+    for _ in range(repeat):
+        for args in calls:
+            started = time.perf_counter()
+            func(*args)
+            samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+def timed_load(cache_dir):
+    """Seconds for a first load from the workbook URL with the given cache directory"""
+    investment_data.DATA_CACHE_DIR = cache_dir
+    investment_data.SNAPSHOT_DIR = os.path.join(cache_dir, "snapshots")
+    started = time.perf_counter()
+    data = investment_data.DataRefresher().refresh()
+    # A first load publishes the dataset lazily and leaves warming to the refresher thread
+    investment_data.warm_dataset(data)
+    return time.perf_counter() - started, data
+
+def benchmark_size(investors, years, seed, repeat):
+    path = workbook_for(investors, years, seed)
+    investment_data.EXCEL_SOURCE_URL = pathlib.Path(path).as_uri()
+    timings = {}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        timings['load_excel_data (cold)'], _ = timed_load(cache_dir)
+        timings['load_excel_data (snapshot)'], data = timed_load(cache_dir)
+
+    users = list(data.user_index('daily_report'))
+    sample = [users[i] for i in np.random.default_rng(seed).choice(len(users), min(SAMPLE_USERS, len(users)), replace=False)]
+    last_date = data.daily_report['Date'].max()
+    last_30_days = [(last_date - pd.Timedelta(days=30)).date(), last_date.date()]
+
+    timings['calculate_user_metrics'] = median_time(
+        investment_data.calculate_user_metrics, [(u, data) for u in sample], repeat)
+    timings['create_user_profit_table'] = median_time(
+        investment_data.create_user_profit_table, [(u, data) for u in sample], repeat)
+    timings['create_user_profit_table (30 days)'] = median_time(
+        investment_data.create_user_profit_table, [(u, data, last_30_days) for u in sample], repeat)
+    timings['create_company_profit_graph'] = median_time(
+        investment_charts.create_company_profit_graph, [(data,)], repeat)
+    timings['create_investment_vs_profit_chart'] = median_time(
+        investment_charts.create_investment_vs_profit_chart, [(data, u) for u in sample[:3]], repeat)
+    timings['create_investor_comparison_chart'] = median_time(
+        investment_charts.create_investor_comparison_chart, [(data, u) for u in sample[:3]], repeat)
+    timings['create_company_investment_vs_profit_chart'] = median_time(
+        investment_charts.create_company_investment_vs_profit_chart, [(data,)], repeat)
+
+    return {
+        'investors': investors,
+        'years': years,
+        'workbook_bytes': os.path.getsize(path),
+        'daily_report_rows': int(data.daily_report['UserID'].notna().sum()),
+        'timings': timings,
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds * 1e6:.0f} us"
+
+def print_results(results, baseline=None):
+    """One block per size; with a baseline, the earlier timing and the ratio new/old"""
+    earlier = {}
+    for result in (baseline or {}).get('results', []):
+        earlier[(result['investors'], result['years'])] = result['timings']
+
+    for result in results:
+        print(f"\n{result['investors']} investors x {result['years']:g} years "
+              f"({result['daily_report_rows']:,} Daily_Report rows)")
+        previous = earlier.get((result['investors'], result['years']), {})
+        for name, seconds in result['timings'].items():
+            line = f"  {name:<44} {format_seconds(seconds):>10}"
+            if name in previous:
+                line += f"   was {format_seconds(previous[name]):>10}  ({seconds / previous[name]:.2f}x)"
+            print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the dashboard's data functions at several data sizes")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated INVESTORSxYEARS")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per timing")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = []
+    for investors, years in parse_sizes(args.sizes):
+        print(f"Benchmarking {investors} investors x {years:g} years...")
+        try:
+            results.append(benchmark_size(investors, years, args.seed, args.repeat))
+        except ValueError as e:
+            print(f"  skipped: {e}")
+
+    run = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'query_backend': investment_data.QUERY_BACKEND,
+        'results': results,
+    }
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2)
+
+    print_results(results, baseline)
+    print(f"\nResults written to {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
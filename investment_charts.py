@@ -0,0 +1,474 @@
+"""Plotly figures for the investment dashboard
+
+Built from an InvestmentDataset and its derived tables (see investment_data); the
+dashboard caches the serialized figures per data version.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from investment_data import get_company_daily, get_investor_comparison, timed_function
+
+# Company profit trend: with more days than this in view the line is downsampled (LTTB) to this
+# many points and drawn with WebGL; at or below it the exact spline-with-markers plot is kept
+PROFIT_TREND_MAX_POINTS = int(os.environ.get("DASHBOARD_TREND_MAX_POINTS", "1000"))
+
+def lttb_indices(x, y, n_out):
+    """Positions of the n_out points Largest-Triangle-Three-Buckets keeps from a sorted series"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # First and last points are always kept; the rest is split into n_out - 2 buckets and each
+    # bucket keeps the point making the largest triangle with the previous pick and the next
+    # bucket's average, which keeps peaks and dips that plain striding would skip
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+def company_profit_trend(data):
+    """Dates and positive daily company profits behind the company profit trend"""
+    company_daily = get_company_daily(data)
+    company_daily = company_daily.loc[company_daily['positive_profit'] > 0, ['positive_profit']]
+    return company_daily.rename(columns={'positive_profit': 'Profit'}).reset_index()
+
+@timed_function
+def create_company_profit_graph(data, date_window=None):
+    """Create company profit graph (excluding negatives) with transparent style from Code 2"""
+    # Daily sums of positive profits (negatives excluded) from the precomputed company table
+    company_daily = company_profit_trend(data)
+    if date_window:
+        in_window = company_daily['Date'].between(pd.Timestamp(date_window[0]), pd.Timestamp(date_window[1]))
+        company_daily = company_daily[in_window]
+    
+    if company_daily.empty:
+        return None
+    
+    if len(company_daily) > PROFIT_TREND_MAX_POINTS:
+        # Too many days for an SVG spline with a marker per day: keep the shape with LTTB and
+        # let WebGL draw it (zooming in with the range control redraws from the full data)
+        days = (company_daily['Date'] - company_daily['Date'].iloc[0]).dt.days.to_numpy(dtype=float)
+        keep = lttb_indices(days, company_daily['Profit'].to_numpy(dtype=float), PROFIT_TREND_MAX_POINTS)
+        shown = company_daily.iloc[keep]
+        fig = go.Figure(go.Scattergl(
+            x=shown['Date'],
+            y=shown['Profit'],
+            mode='lines',
+            name='Profit',
+            line=dict(color='#00ff88')
+        ))
+        fig.update_layout(
+            title=f'📈 Company Daily Profit Trend (Positive Profits Only, {len(shown):,} of {len(company_daily):,} days shown)'
+        )
+    else:
+        # Using style from Code 2
+        fig = px.line(
+            company_daily,
+            x='Date',
+            y='Profit',
+            title='📈 Company Daily Profit Trend (Positive Profits Only)',
+            markers=True,
+            line_shape='spline',
+            color_discrete_sequence=['#00ff88']  # From Code 2
+        )
+    
+    fig.update_layout(
+        xaxis_title='Date',
+        yaxis_title='Total Profit (₹)',
+        hovermode='x unified',
+        template='plotly_dark',  # Changed from Code 1's 'plotly_white' to Code 2's 'plotly_dark'
+        plot_bgcolor='rgba(0,0,0,0)',  # From Code 2
+        paper_bgcolor='rgba(0,0,0,0)',  # From Code 2
+        font_color='white',  # From Code 2
+        transition={'duration': 500}
+    )
+    
+    return fig
+
+@timed_function
+def create_investor_comparison_chart(data, selected_user=None):
+    """Investment vs profit of the largest investors, the viewer's own bars and the ROI / profit bands"""
+    investor_df = data.investors
+    if investor_df.empty:
+        return None
+    
+    comparison = get_investor_comparison(data)
+    invested, profit, roi = comparison['invested'], comparison['profit'], comparison['roi']
+    positions = list(comparison['top'])
+    user_position = None
+    if selected_user:
+        found = data.user_index('investors').get(selected_user)
+        if found is not None and len(found):
+            user_position = int(found[0])
+            if user_position not in positions:
+                positions.append(user_position)
+    
+    names = investor_df['Name'].astype(str).to_numpy()
+    is_user = [position == user_position for position in positions]
+    labels = [f"⭐ {names[p]} (you)" if you else names[p] for p, you in zip(positions, is_user)]
+    hovertext = [
+        f"<b>{names[p]}</b><br>" +
+        f"Investment: ₹{invested[p]:,.2f}<br>" +
+        f"Profit: ₹{profit[p]:,.2f}<br>" +
+        f"Status: {'Profit' if profit[p] >= 0 else 'Loss'}<br>" +
+        f"ROI: {roi[p]:.1f}%"
+        for p in positions
+    ]
+    
+    # Five traces (investment bars, profit bars, ROI markers and the two band lines) and no
+    # per-bar shapes, whatever the number of investors
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=labels,
+        y=invested[positions],
+        name='Total Investment',
+        marker_color=['#FFD54F' if you else '#1E88E5' for you in is_user],  # Viewer in gold
+        opacity=0.8,
+        width=0.4,
+        offset=-0.2,
+        text=[f'₹{x:,.0f}' for x in invested[positions]],
+        textposition='auto',
+        hovertext=hovertext,
+        hoverinfo='text'
+    ))
+    fig.add_trace(go.Bar(
+        x=labels,
+        y=profit[positions],
+        name='Total Profit',
+        marker_color=['#00C853' if x >= 0 else '#FF5252' for x in profit[positions]],
+        opacity=0.8,
+        width=0.4,
+        offset=0.2,
+        text=[f'₹{x:,.0f}' for x in profit[positions]],
+        textposition='auto',
+        hovertext=hovertext,
+        hoverinfo='text'
+    ))
+    fig.add_trace(go.Scatter(
+        x=labels,
+        y=roi[positions],
+        name='ROI %',
+        mode='markers',
+        marker=dict(symbol='diamond', size=10, color='#E040FB'),
+        yaxis='y2',
+        hovertemplate='ROI: %{y:.1f}%<extra></extra>'
+    ))
+    
+    # Band lines run across the whole axis: None breaks the line between p10, p50 and p90
+    band_x = [labels[0], labels[-1], None] * 3
+    def band_y(values):
+        return [y for value in values for y in (value, value, None)]
+    fig.add_trace(go.Scatter(
+        x=band_x,
+        y=band_y(comparison['profit_bands']),
+        name='Profit p10 / p50 / p90 (all investors)',
+        mode='lines',
+        line=dict(color='rgba(0,200,83,0.6)', dash='dash', width=1),
+        hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=band_x,
+        y=band_y(comparison['roi_bands']),
+        name='ROI p10 / p50 / p90 (all investors)',
+        mode='lines',
+        line=dict(color='rgba(224,64,251,0.6)', dash='dot', width=1),
+        yaxis='y2',
+        hoverinfo='skip'
+    ))
+    
+    title = f'📊 Investment vs Profit: Top {len(comparison["top"])} of {len(invested):,} Investors'
+    if user_position is not None:
+        valid_roi = roi[~np.isnan(roi)]
+        invest_rank = int((invested > invested[user_position]).sum()) + 1
+        title += f'<br><sup>You: #{invest_rank:,} by investment'
+        if len(valid_roi) and not np.isnan(roi[user_position]):
+            roi_percentile = (valid_roi <= roi[user_position]).mean() * 100
+            title += f', ROI better than or equal to {roi_percentile:.0f}% of investors'
+        title += '</sup>'
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title='Investors',
+        yaxis_title='Amount (₹)',
+        yaxis2=dict(title='ROI (%)', overlaying='y', side='right', showgrid=False, ticksuffix='%'),
+        barmode='group',
+        bargap=0.15,
+        bargroupgap=0.1,
+        hovermode='x unified',
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        template='plotly_dark',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='white',
+        height=600,
+        margin=dict(l=50, r=50, t=110, b=100)
+    )
+    fig.update_layout(yaxis_tickprefix='₹ ')
+    fig.update_xaxes(tickangle=45)
+    
+    return fig
+
+@timed_function
+def create_investment_vs_profit_chart(data, selected_user=None):
+    """Create candle-type vertical bar chart for investment vs profit"""
+    investor_df = data.investors
+    
+    if investor_df.empty:
+        return None
+    
+    # Prepare data for all users or specific user
+    if selected_user:
+        investor_df = data.user_rows('investors', selected_user)
+        if investor_df.empty:
+            return None
+    
+    # Largest investors first (the precomputed top K rather than sorting everyone)
+    if not selected_user:
+        investor_df = investor_df.iloc[get_investor_comparison(data)['top']]
+    
+    # Create figure
+    fig = go.Figure()
+    
+    # Add Investment bars (base)
+    fig.add_trace(go.Bar(
+        x=investor_df['Name'],
+        y=investor_df['Total_Invested_Amount'],
+        name='Total Investment',
+        marker_color='#1E88E5',  # Blue
+        opacity=0.8,
+        width=0.4,
+        offset=-0.2,  # Position to left
+        text=[f'₹{x:,.0f}' for x in investor_df['Total_Invested_Amount']],
+        textposition='auto',
+        hovertext=[
+            f"<b>{name}</b><br>" +
+            f"Investment: ₹{inv:,.2f}<br>" +
+            f"Profit: ₹{profit:,.2f}<br>" +
+            f"ROI: {roi:.1f}%"
+            for name, inv, profit, roi in zip(
+                investor_df['Name'],
+                investor_df['Total_Invested_Amount'],
+                investor_df['Total Profit Earned'],
+                (investor_df['Total Profit Earned'] / investor_df['Total_Invested_Amount'] * 100)
+            )
+        ],
+        hoverinfo='text'
+    ))
+    
+    # Add Profit bars (on top)
+    profit_column = 'Total Profit Earned'
+    
+    # Determine profit colors (green for positive, red for negative)
+    profit_colors = []
+    for profit in investor_df[profit_column]:
+        if profit >= 0:
+            profit_colors.append('#00C853')  # Green
+        else:
+            profit_colors.append('#FF5252')  # Red
+    
+    fig.add_trace(go.Bar(
+        x=investor_df['Name'],
+        y=investor_df[profit_column],
+        name='Total Profit',
+        marker_color=profit_colors,
+        opacity=0.8,
+        width=0.4,
+        offset=0.2,  # Position to right
+        text=[f'₹{x:,.0f}' for x in investor_df[profit_column]],
+        textposition='auto',
+        hovertext=[
+            f"<b>{name}</b><br>" +
+            f"Investment: ₹{inv:,.2f}<br>" +
+            f"Profit: ₹{profit:,.2f}<br>" +
+            f"Status: {'Profit' if profit >= 0 else 'Loss'}<br>" +
+            f"ROI: {roi:.1f}%"
+            for name, inv, profit, roi in zip(
+                investor_df['Name'],
+                investor_df['Total_Invested_Amount'],
+                investor_df[profit_column],
+                (investor_df[profit_column] / investor_df['Total_Invested_Amount'] * 100)
+            )
+        ],
+        hoverinfo='text'
+    ))
+    
+    # Add connecting lines between bars (optional, creates candle effect)
+    for i, (inv, profit) in enumerate(zip(investor_df['Total_Invested_Amount'], investor_df[profit_column])):
+        # Add line from investment bar to profit bar
+        fig.add_shape(
+            type="line",
+            x0=i-0.1, x1=i+0.1,
+            y0=inv, y1=inv,
+            line=dict(color="rgba(255,255,255,0.3)", width=1),
+        )
+    
+    # Update layout
+    fig.update_layout(
+        title='📊 Investment vs Profit Analysis (Candle-Type Bars)',
+        xaxis_title='Investors',
+        yaxis_title='Amount (₹)',
+        barmode='group',
+        bargap=0.15,
+        bargroupgap=0.1,
+        hovermode='x unified',
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        template='plotly_dark',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='white',
+        height=500 if selected_user else 600,
+        margin=dict(l=50, r=50, t=80, b=100)
+    )
+    
+    # Format y-axis with ₹ symbol
+    fig.update_yaxes(tickprefix='₹ ')
+    
+    # Rotate x-axis labels for better readability
+    fig.update_xaxes(tickangle=45)
+    
+    return fig
+
+@timed_function
+def create_company_investment_vs_profit_chart(data):
+    """Create candle-type vertical bar chart for COMPANY investment vs profit"""
+    investor_df = data.investors
+    
+    if investor_df.empty:
+        return None
+    
+    # Get company totals
+    company_total_investment = investor_df['Total_Invested_Amount'].sum()
+    
+    # Get total company profit (sum of the unique daily Total_Profit values)
+    total_company_profit = get_company_daily(data)['total_profit'].sum()
+    
+    # Create data for the chart
+    categories = ['Company']
+    investments = [company_total_investment]
+    profits = [total_company_profit]
+    
+    # Create figure
+    fig = go.Figure()
+    
+    # Add Investment bars (base)
+    fig.add_trace(go.Bar(
+        x=categories,
+        y=investments,
+        name='Total Company Investment',
+        marker_color='#1E88E5',  # Blue
+        opacity=0.8,
+        width=0.4,
+        offset=-0.2,  # Position to left
+        text=[f'₹{x:,.0f}' for x in investments],
+        textposition='auto',
+        hovertext=[
+            f"<b>Company</b><br>" +
+            f"Total Investment: ₹{inv:,.2f}<br>" +
+            f"Total Profit: ₹{profit:,.2f}<br>" +
+            f"ROI: {roi:.1f}%"
+            for inv, profit, roi in zip(
+                investments,
+                profits,
+                [(profit/inv*100) if inv > 0 else 0 for inv, profit in zip(investments, profits)]
+            )
+        ],
+        hoverinfo='text'
+    ))
+    
+    # Add Profit bars (on top)
+    profit_colors = ['#00C853' if profit >= 0 else '#FF5252' for profit in profits]
+    
+    fig.add_trace(go.Bar(
+        x=categories,
+        y=profits,
+        name='Total Company Profit',
+        marker_color=profit_colors,
+        opacity=0.8,
+        width=0.4,
+        offset=0.2,  # Position to right
+        text=[f'₹{x:,.0f}' for x in profits],
+        textposition='auto',
+        hovertext=[
+            f"<b>Company</b><br>" +
+            f"Total Investment: ₹{inv:,.2f}<br>" +
+            f"Total Profit: ₹{profit:,.2f}<br>" +
+            f"Status: {'Profit' if profit >= 0 else 'Loss'}<br>" +
+            f"ROI: {roi:.1f}%"
+            for inv, profit, roi in zip(
+                investments,
+                profits,
+                [(profit/inv*100) if inv > 0 else 0 for inv, profit in zip(investments, profits)]
+            )
+        ],
+        hoverinfo='text'
+    ))
+    
+    # Add connecting lines between bars
+    for i, (inv, profit) in enumerate(zip(investments, profits)):
+        # Add line from investment bar to profit bar
+        fig.add_shape(
+            type="line",
+            x0=i-0.1, x1=i+0.1,
+            y0=inv, y1=inv,
+            line=dict(color="rgba(255,255,255,0.3)", width=1),
+        )
+    
+    # Update layout
+    fig.update_layout(
+        title='🏢 Company Total Investment vs Total Profit',
+        xaxis_title='',
+        yaxis_title='Amount (₹)',
+        barmode='group',
+        bargap=0.15,
+        bargroupgap=0.1,
+        hovermode='x unified',
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        template='plotly_dark',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='white',
+        height=400,
+        margin=dict(l=50, r=50, t=80, b=50)
+    )
+    
+    # Format y-axis with ₹ symbol
+    fig.update_yaxes(tickprefix='₹ ')
+    
+    return fig
+
@@ -0,0 +1,1518 @@
+"""Investment data layer for the dashboard
+
+Fetches the investment workbook, normalizes its sheets into typed, read-only tables shared by
+every session (with Feather snapshots of each parsed version), answers the per-user and
+company queries from in-process indexes or an embedded SQLite copy, and keeps the latest
+version loaded in a background thread. Nothing here depends on Streamlit, so the benchmarks
+and tests import it directly.
+"""
+
+import functools
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import warnings
+from collections import deque
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # Snapshots are optional - without pyarrow every cold start parses the workbook
+    pa = None
+    feather = None
+
+# Shared data is read-only: with copy-on-write, slices and derived frames never write back into
+# the cached DataFrames (always on from pandas 3.0, opt-in before that)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# Data source settings
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+EXCEL_FILE_NAME = "INVESTMENT_APP_DETAILS_UPDATE.xlsx"
+# Source URL can be overridden (e.g. to point at a local HTTP server while testing)
+EXCEL_SOURCE_URL = os.environ.get(
+    "INVESTMENT_EXCEL_URL",
+    f"https://raw.githubusercontent.com/Arun2310Rajaputhra/INVESTORS-DASHBOARD/main/{EXCEL_FILE_NAME}"
+)
+BUNDLED_EXCEL_PATH = os.path.join(APP_DIR, EXCEL_FILE_NAME)
+DATA_CACHE_DIR = os.environ.get("INVESTMENT_DATA_CACHE_DIR", os.path.join(APP_DIR, ".data_cache"))
+FETCH_TIMEOUT_SECONDS = 15
+SNAPSHOT_DIR = os.path.join(DATA_CACHE_DIR, "snapshots")
+SNAPSHOTS_TO_KEEP = 3
+# "Compare with Other Investors" shows this many largest investors (plus the viewer if outside them)
+COMPARISON_TOP_K = 10
+# Memory compaction: strings with at most this many distinct values per non-null value become
+# categoricals, and whole-number amounts whose total stays below 2**24 are stored as float32
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+FLOAT32_EXACT_INTEGER_LIMIT = 2 ** 24
+# Set DASHBOARD_STRICT_DATA=1 to fail a run that modified the shared (cached) data
+STRICT_DATA_CHECKS = os.environ.get("DASHBOARD_STRICT_DATA") == "1"
+# How often the background refresher revalidates the workbook
+REFRESH_INTERVAL_SECONDS = int(os.environ.get("INVESTMENT_REFRESH_SECONDS", "300"))
+# Tables whose sheets only grow by new dates at the bottom. A new workbook version re-reads the
+# rows from the last ingested (Date, UserID) on, and for the rows above it only the columns that
+# are edited in place (a payout moves Payment from Pending to Completed, ...). Edits to any other
+# column of an older row are only picked up on a fresh start - set INVESTMENT_INCREMENTAL_INGEST=0
+# to always re-parse these tables in full.
+APPEND_ONLY_TABLES = ['daily_report', 'daily_profits']
+MUTABLE_COLUMNS = ['Payment', 'Payment_Status', 'Remarks', 'Re-Invest_ID', 'Transaction_ID', 'Transaction_Date']
+INCREMENTAL_INGEST = os.environ.get("INVESTMENT_INCREMENTAL_INGEST", "1") == "1"
+# Where per-user lookups and company aggregates run: 'pandas' (in-process indexes) or 'sqlite'
+# (an in-memory SQLite copy of the normalized tables, queried through its indexes)
+QUERY_BACKEND = os.environ.get("DASHBOARD_QUERY_BACKEND", "pandas")
+# Timings kept for the performance panel (most recent calls across all sessions)
+TIMING_LOG_SIZE = 5000
+
+class TimingLog:
+    """Ring buffer of (name, seconds, rows, finished_at) for timed sections and data functions"""
+    
+    def __init__(self, size=TIMING_LOG_SIZE):
+        self._records = deque(maxlen=size)
+        self._lock = threading.Lock()
+    
+    def record(self, name, seconds, rows=None):
+        with self._lock:
+            self._records.append((name, seconds, rows, time.time()))
+    
+    def summary(self):
+        """Calls, p50 / p95 / max milliseconds and median rows per name, slowest p95 first"""
+        with self._lock:
+            records = list(self._records)
+        columns = ['calls', 'p50_ms', 'p95_ms', 'max_ms', 'rows_p50']
+        if not records:
+            return pd.DataFrame(columns=columns)
+        df = pd.DataFrame(records, columns=['name', 'seconds', 'rows', 'finished_at'])
+        df['ms'] = df['seconds'] * 1000
+        df['rows'] = pd.to_numeric(df['rows'], errors='coerce')
+        by_name = df.groupby('name')
+        summary = pd.DataFrame({
+            'calls': by_name.size(),
+            'p50_ms': by_name['ms'].median(),
+            'p95_ms': by_name['ms'].quantile(0.95),
+            'max_ms': by_name['ms'].max(),
+            'rows_p50': by_name['rows'].median(),
+        })
+        return summary.sort_values('p95_ms', ascending=False)[columns]
+    
+    def __len__(self):
+        return len(self._records)
+
+_timing_log = TimingLog()
+
+def get_timing_log():
+    """Process-wide timing log (shared by all sessions and the background refresher)"""
+    return _timing_log
+
+@contextmanager
+def timed(name):
+    """Record the wall time of a block; set span['rows'] inside it to record rows processed"""
+    span = {'rows': None}
+    started = time.perf_counter()
+    try:
+        yield span
+    finally:
+        get_timing_log().record(name, time.perf_counter() - started, span['rows'])
+
+def timed_function(func):
+    """Decorator: record every call of func under its name (rows = len of a DataFrame result)"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed(func.__name__) as span:
+            result = func(*args, **kwargs)
+            if isinstance(result, (pd.DataFrame, pd.Series)):
+                span['rows'] = len(result)
+            return result
+    return wrapper
+
+def file_content_hash(path):
+    """Return the SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fetch_workbook(url=None, cache_dir=None, timeout=FETCH_TIMEOUT_SECONDS):
+    """Fetch the workbook with a conditional request and return (local_path, source)
+
+    source is one of:
+      'downloaded'   - the server sent a new copy (200)
+      'not-modified' - the server answered 304, the last good copy on disk is reused
+      'cached'       - the network failed, the last good copy on disk is reused
+      'bundled'      - the network failed and there is no copy on disk, the repo's xlsx is used
+    """
+    url = url or EXCEL_SOURCE_URL
+    cache_dir = cache_dir or DATA_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    cached_path = os.path.join(cache_dir, EXCEL_FILE_NAME)
+    meta_path = cached_path + '.meta.json'
+    
+    # Validators from the last successful download
+    meta = {}
+    if os.path.exists(cached_path) and os.path.exists(meta_path):
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+    
+    request = urllib.request.Request(url)
+    if meta.get('etag'):
+        request.add_header('If-None-Match', meta['etag'])
+    if meta.get('last_modified'):
+        request.add_header('If-Modified-Since', meta['last_modified'])
+    
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+            new_meta = {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+        
+        # Write to a temp file first so a half-written download never replaces the last good copy
+        tmp_path = cached_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, cached_path)
+        with open(meta_path, 'w') as f:
+            json.dump(new_meta, f)
+        return cached_path, 'downloaded'
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and os.path.exists(cached_path):
+            return cached_path, 'not-modified'
+        error = e
+    except (urllib.error.URLError, OSError) as e:
+        error = e
+    
+    # No usable network response - fall back to whatever we have locally
+    if os.path.exists(cached_path):
+        return cached_path, 'cached'
+    if os.path.exists(BUNDLED_EXCEL_PATH):
+        return BUNDLED_EXCEL_PATH, 'bundled'
+    raise error
+
+# Sheets the dashboard reads (the charges sheet has been named several ways over time).
+# Anything else in the workbook, e.g. 'Rough Sheet' or 'Loss_Recovery', is never parsed.
+CHARGES_SHEET_NAMES = ['Platofrm_Maintaince_Charges', 'Platform_Maintaince_Charges',
+                       'Platform_Maintenance_Charges', 'Charges']
+DASHBOARD_SHEETS = ['Investor_Details', 'Daily_Report', 'Daily_Profits_Calculations',
+                    'Re_Investment_Details'] + CHARGES_SHEET_NAMES
+
+def make_arrow_safe(df):
+    """Store mixed-type object columns (e.g. Transaction_Date holding dates and text) as strings"""
+    safe_df = df
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        # Arrow would reject (or silently coerce) a column mixing Python types
+        if df[col].dropna().map(type).nunique() > 1:
+            if safe_df is df:
+                safe_df = df.copy()
+            safe_df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return safe_df
+
+def snapshot_file(content_hash, name, snapshot_dir=None):
+    """Path of a snapshot file for one workbook version"""
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, content_hash, urllib.parse.quote(name, safe=''))
+
+def write_atomic(path, write):
+    """Call write(tmp_path) and rename the result into place, so other processes never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def write_sheet_snapshot(content_hash, sheet_name, df, snapshot_dir=None):
+    """Write one sheet as an uncompressed Feather file under snapshots/<content_hash>/"""
+    if feather is None:
+        return False
+    write_atomic(
+        snapshot_file(content_hash, sheet_name + '.feather', snapshot_dir),
+        # Uncompressed so later reads can be memory-mapped
+        lambda tmp: feather.write_feather(make_arrow_safe(df.reset_index(drop=True)), tmp,
+                                          compression='uncompressed')
+    )
+    return True
+
+def read_sheet_snapshot(content_hash, sheet_name, snapshot_dir=None):
+    """Memory-map one sheet's Feather snapshot, or return None if there is none"""
+    if feather is None:
+        return None
+    path = snapshot_file(content_hash, sheet_name + '.feather', snapshot_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        return feather.read_table(path, memory_map=True).to_pandas()
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+def write_snapshot_sheet_names(content_hash, sheet_names, snapshot_dir=None):
+    """Record the workbook's sheet names so later processes don't need to open the xlsx at all"""
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    is_new_version = not os.path.isdir(os.path.join(snapshot_dir, content_hash))
+    
+    def write(tmp):
+        with open(tmp, 'w') as f:
+            json.dump(sheet_names, f)
+    write_atomic(snapshot_file(content_hash, 'sheets.json', snapshot_dir), write)
+    
+    if is_new_version:
+        prune_snapshots(snapshot_dir, keep=content_hash)
+
+def read_snapshot_sheet_names(content_hash, snapshot_dir=None):
+    """Sheet names recorded for a workbook version, or None"""
+    try:
+        with open(snapshot_file(content_hash, 'sheets.json', snapshot_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def prune_snapshots(snapshot_dir, keep):
+    """Remove all but the newest SNAPSHOTS_TO_KEEP snapshot directories"""
+    entries = []
+    for name in os.listdir(snapshot_dir):
+        path = os.path.join(snapshot_dir, name)
+        if os.path.isdir(path) and name != keep:
+            entries.append((os.path.getmtime(path), path))
+    for _, path in sorted(entries, reverse=True)[SNAPSHOTS_TO_KEEP - 1:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+class WorkbookSheets(Mapping):
+    """Read-only mapping of sheet name -> DataFrame that parses each sheet on first access
+
+    Sheets come from the Feather snapshot for this content hash when one exists, otherwise
+    from the xlsx (and a snapshot is written for next time). Only sheets listed in
+    `allowed_sheets` are exposed, so unused sheets are never parsed.
+    """
+    
+    def __init__(self, path, content_hash, allowed_sheets=None):
+        self.path = path
+        self.content_hash = content_hash
+        self._excel_data = None
+        self._sheets = {}
+        self._lock = threading.Lock()
+        self._sheet_locks = {}
+        # One xlsx parse at a time - they share one openpyxl workbook
+        self._excel_lock = threading.Lock()
+        
+        all_sheet_names = read_snapshot_sheet_names(content_hash)
+        if all_sheet_names is None:
+            all_sheet_names = self._excel().sheet_names
+            try:
+                write_snapshot_sheet_names(content_hash, all_sheet_names)
+            except OSError:
+                pass  # A read-only cache dir only costs us the snapshot
+        
+        allowed_sheets = DASHBOARD_SHEETS if allowed_sheets is None else allowed_sheets
+        self.all_sheet_names = all_sheet_names
+        self.sheet_names = [name for name in all_sheet_names if name in allowed_sheets]
+    
+    def _excel(self):
+        """Open the workbook (openpyxl reads sheets lazily, so this doesn't parse any rows)"""
+        if self._excel_data is None:
+            self._excel_data = pd.ExcelFile(self.path)
+        return self._excel_data
+    
+    def _load_sheet(self, sheet_name):
+        df = read_sheet_snapshot(self.content_hash, sheet_name)
+        if df is not None:
+            return df
+        
+        with self._excel_lock:
+            df = self._excel().parse(sheet_name)
+        if sheet_name in CHARGES_SHEET_NAMES:
+            df.columns = df.columns.str.strip()
+        try:
+            write_sheet_snapshot(self.content_hash, sheet_name, df)
+        except OSError:
+            pass  # A read-only cache dir only costs us the snapshot
+        return df
+    
+    def __getitem__(self, sheet_name):
+        if sheet_name not in self.sheet_names:
+            raise KeyError(sheet_name)
+        # Sessions share this object, so make sure each sheet is parsed only once (a session
+        # reading one sheet doesn't wait while another is being parsed)
+        with self._lock:
+            sheet_lock = self._sheet_locks.setdefault(sheet_name, threading.Lock())
+        with sheet_lock:
+            if sheet_name not in self._sheets:
+                self._sheets[sheet_name] = self._load_sheet(sheet_name)
+            return self._sheets[sheet_name]
+    
+    def __contains__(self, sheet_name):
+        return sheet_name in self.sheet_names
+    
+    def __iter__(self):
+        return iter(self.sheet_names)
+    
+    def __len__(self):
+        return len(self.sheet_names)
+    
+    def loaded_sheets(self):
+        """Names of sheets that have been parsed so far"""
+        return list(self._sheets)
+    
+    def read_rows_from(self, sheet_name, first_row, columns_above=()):
+        """Parse a sheet from data row `first_row` (0-based, below the header) to the end
+        
+        Returns (above, rows): `rows` has every column, its index continuing from `first_row`;
+        `above` has just the `columns_above` the sheet has, for the rows before `first_row`
+        (read in the same pass). Without columns_above openpyxl still scans the rows above,
+        but never builds their cells, so the cost follows the number of rows returned.
+        Returns None when the sheet is missing or its header can't be read the way pandas would.
+        """
+        if sheet_name not in self.sheet_names:
+            return None
+        workbook = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[sheet_name]
+            header = next(worksheet.iter_rows(max_row=1, values_only=True), ())
+            # Blank or repeated headers get renamed by pandas - leave those sheets to a full parse
+            if not header or None in header or len(set(header)) != len(header):
+                return None
+            positions = [i for i, col in enumerate(header) if str(col).strip() in columns_above]
+            above_columns = [str(header[i]).strip() for i in positions]
+            all_rows = worksheet.iter_rows(min_row=2 if positions else first_row + 2, max_col=len(header),
+                                           values_only=True)
+            above = []
+            if positions:
+                above = [[values[i] for i in positions] for values in itertools.islice(all_rows, first_row)]
+            rows = list(all_rows)
+        finally:
+            workbook.close()
+        
+        # Like pandas, drop the empty rows Excel keeps at the bottom of a sheet
+        while rows and all(value is None for value in rows[-1]):
+            rows.pop()
+        return (pd.DataFrame(above, columns=above_columns, index=pd.RangeIndex(len(above))),
+                pd.DataFrame(rows, columns=list(header), index=pd.RangeIndex(first_row, first_row + len(rows))))
+
+# Canonical schema for every table the dashboard reads. Column aliases, dtypes and
+# defaults are resolved once per workbook version, so the rest of the app can use
+# direct column access.
+USER_ID_ALIASES = ['UserID', 'Userid', 'USERID', 'userid', 'User ID', 'User_Id']
+TOTAL_PROFIT_ALIASES = ['Total_Profit', 'Total Profit', 'TotalProfit', 'total_profit']
+
+TABLE_SCHEMAS = {
+    'investors': {
+        'sheets': ['Investor_Details'],
+        'aliases': {
+            'UserID': USER_ID_ALIASES,
+            'Name': ['Name', 'Contact_Name'],
+            'Total Profit Earned': ['Total Profit Earned', 'Total Profit', 'Total_Profit_Earned'],
+        },
+        'required': ['UserID', 'Name', 'Total_Invested_Amount'],
+        'defaults': {'Total Profit Earned': 0.0},
+        'dates': [],
+        'categories': ['UserID'],
+        'amounts': ['Total_Invested_Amount', 'Total Profit Earned'],
+    },
+    'daily_report': {
+        'sheets': ['Daily_Report'],
+        'aliases': {'UserID': USER_ID_ALIASES, 'Total_Profit': TOTAL_PROFIT_ALIASES},
+        'required': ['Date', 'UserID', 'Profit'],
+        'defaults': {'Remarks': ''},
+        'dates': ['Date'],
+        'categories': ['UserID', 'Payment'],
+        'amounts': ['Invest_Amount', 'Company_Total_Invest', 'Profit', 'Total_Profit'],
+    },
+    'daily_profits': {
+        'sheets': ['Daily_Profits_Calculations'],
+        'aliases': {'UserID': USER_ID_ALIASES, 'Total_Profit': TOTAL_PROFIT_ALIASES},
+        'required': ['Date', 'UserID', 'User_Invested_Amount'],
+        'defaults': {'Transaction_ID': 'N/A', 'Transaction_Date': pd.NaT},
+        'dates': ['Date', 'Transaction_Date'],
+        'categories': ['UserID', 'Payment_Status'],
+        'amounts': ['User_Invested_Amount', 'User_Invest_Amount_As_On_Date',
+                    'Company_Total_Investment_As_On_Date', 'Total_Profit'],
+    },
+    'reinvestments': {
+        'sheets': ['Re_Investment_Details'],
+        'aliases': {'UserID': USER_ID_ALIASES},
+        'required': ['UserID'],
+        'defaults': {},
+        'dates': [],
+        'categories': ['UserID', 'Applied_To_Main_Investment_Status'],
+        'amounts': ['Requested_Amount', 'Total_Added_Amount', 'Pending_Amount_To_Be_Add'],
+    },
+    'charges': {
+        'sheets': CHARGES_SHEET_NAMES,
+        'aliases': {'UserID': USER_ID_ALIASES},
+        'required': ['UserID'],
+        'defaults': {},
+        'dates': [],
+        'categories': ['UserID'],
+        'amounts': ['Charge_Amt', 'Charge_Per_Head', 'Paid_Amt', 'Pending_Amt'],
+    },
+}
+
+def normalize_table(df, schema, table_name):
+    """Rename aliases to canonical columns, fill defaults, coerce dtypes and validate"""
+    df = df.copy()
+    df.columns = [str(col).strip() for col in df.columns]
+    
+    # Resolve aliases (first match wins)
+    renames = {}
+    for canonical, aliases in schema['aliases'].items():
+        if canonical in df.columns:
+            continue
+        for alias in aliases:
+            if alias in df.columns:
+                renames[alias] = canonical
+                break
+    df = df.rename(columns=renames)
+    
+    # Company Total_Profit is per date - if the sheet lacks it, derive it from the per-user profits
+    if table_name == 'daily_report' and 'Total_Profit' not in df.columns and {'Date', 'Profit'} <= set(df.columns):
+        df['Total_Profit'] = df.groupby('Date')['Profit'].transform('sum')
+    
+    for col, default in schema['defaults'].items():
+        if col not in df.columns:
+            df[col] = default
+    
+    missing = [col for col in schema['required'] if col not in df.columns]
+    if missing:
+        raise ValueError(f"Sheet '{table_name}' is missing required column(s): {', '.join(missing)}")
+    
+    return coerce_columns(df, schema)
+
+def coerce_columns(df, schema):
+    """Give a table's columns (all of them, or any subset) their schema dtypes, then compact them"""
+    for col in schema['dates']:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in schema['amounts']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    for col in schema['categories']:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    return compact_table(df)
+
+def compact_table(df):
+    """Shrink a normalized table's memory without changing any value
+
+    - repeated strings (Name, Remarks, Transaction_ID, ...) become categoricals
+    - whole-number amounts become float32 when even their total fits float32's exact
+      integer range, so sums stay exact
+    - integer columns are downcast to the smallest integer type that holds them
+    """
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+            non_null = series.count()
+            if non_null and series.nunique() <= non_null * CATEGORY_MAX_UNIQUE_RATIO:
+                df[col] = series.astype('category')
+        elif series.dtype == 'float64':
+            values = series.to_numpy()
+            values = values[~np.isnan(values)]
+            if np.array_equal(values, np.round(values)) and np.abs(values).sum() < FLOAT32_EXACT_INTEGER_LIMIT:
+                df[col] = series.astype('float32')
+        elif pd.api.types.is_integer_dtype(series.dtype) and not isinstance(series.dtype, pd.CategoricalDtype):
+            df[col] = pd.to_numeric(series, downcast='integer')
+    return df
+
+def is_text_dtype(dtype):
+    """Whether a column holds text (object, string or categorical)"""
+    return dtype == object or isinstance(dtype, (pd.StringDtype, pd.CategoricalDtype))
+
+def retype_column(old, new):
+    """Concatenate two halves of a column from scratch and type it as a full load would"""
+    combined = pd.concat([old.astype(object), new.astype(object)], ignore_index=True).infer_objects()
+    return compact_table(combined.to_frame(old.name))[old.name].array
+
+def append_table(head, tail):
+    """Concatenate newly ingested rows onto a normalized table, keeping its dtypes
+    
+    Categoricals are merged with union_categoricals (a plain concat would fall back to object),
+    with categories sorted like astype('category') sorts them. A compacted float32 column stays
+    float32 only while the combined column still qualifies. A column whose two halves were typed
+    differently (e.g. Remarks that was empty until today) is retyped as a full load would.
+    """
+    columns = {}
+    for col in head.columns:
+        old, new = head[col], tail[col]
+        if not new.count():
+            new = new.astype(old.dtype)
+        if isinstance(old.dtype, pd.CategoricalDtype):
+            try:
+                columns[col] = union_categoricals([old.array, new.astype('category').array], sort_categories=True)
+            except TypeError:
+                columns[col] = retype_column(old, new)  # Categories of different dtypes
+        elif old.dtype.kind == 'f' and new.dtype.kind == 'f':
+            combined = np.concatenate([old.to_numpy(dtype='float64'), new.to_numpy(dtype='float64')])
+            values = combined[~np.isnan(combined)]
+            whole_and_small = (np.array_equal(values, np.round(values))
+                               and np.abs(values).sum() < FLOAT32_EXACT_INTEGER_LIMIT)
+            columns[col] = combined.astype('float32' if whole_and_small else 'float64')
+        elif (old.dtype == new.dtype or old.dtype.kind == new.dtype.kind == 'M'
+              or is_text_dtype(old.dtype) and is_text_dtype(new.dtype)):
+            columns[col] = pd.concat([old, new.astype(old.dtype)]).array
+        else:
+            columns[col] = retype_column(old, new)
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(head) + len(tail)))
+
+def ingest_watermark(table, start=0):
+    """Last (Date, UserID) row of an append-only table, searching from row `start`
+    
+    Returns {'row', 'date', 'user', 'day_start'} (day_start is the first row of that date)
+    or None when the table has no dated rows.
+    """
+    dates = table['Date'].to_numpy()[start:]
+    dated = np.flatnonzero(~np.isnat(dates) & table['UserID'].notna().to_numpy()[start:])
+    if not len(dated):
+        return None
+    row = start + int(dated[-1])
+    
+    # Days are contiguous, so walk back over this date's rows (and the blank rows between them)
+    all_dates = table['Date'].to_numpy()
+    day_start = row
+    while day_start > 0 and (np.isnat(all_dates[day_start - 1]) or all_dates[day_start - 1] == all_dates[row]):
+        day_start -= 1
+    return {
+        'row': row,
+        'date': table['Date'].iat[row],
+        'user': table['UserID'].iat[row],
+        'day_start': day_start,
+    }
+
+def empty_table(schema):
+    """Empty frame with the canonical columns, for a sheet the workbook doesn't have"""
+    columns = list(dict.fromkeys(schema['required'] + list(schema['aliases']) + list(schema['defaults'])))
+    return pd.DataFrame(columns=columns)
+
+def freeze_data(obj):
+    """Make the NumPy buffers behind a DataFrame / ndarray / dict of them read-only (in place)
+
+    Raw writes into shared buffers (e.g. through .values or an index array) then raise
+    ValueError instead of silently changing what every other session sees. Assignments
+    through the DataFrame itself (.loc, df[col] = ...) don't touch the locked buffers under
+    copy-on-write, but still change the shared frame - DASHBOARD_STRICT_DATA=1 catches those.
+    """
+    if isinstance(obj, dict):
+        for value in obj.values():
+            freeze_data(value)
+    elif isinstance(obj, pd.DataFrame):
+        for col in range(obj.shape[1]):
+            values = obj.iloc[:, col].array
+            freeze_data(values.codes if isinstance(values, pd.Categorical) else np.asarray(values))
+    elif isinstance(obj, np.ndarray):
+        # Columns are views into pandas' blocks - the owning array is the one that must be locked
+        while isinstance(obj, np.ndarray):
+            obj.flags.writeable = False
+            obj = obj.base
+    return obj
+
+def data_fingerprint(obj):
+    """Content fingerprint of a DataFrame or dict of DataFrames (for the strict data checks)"""
+    if isinstance(obj, dict):
+        return {key: data_fingerprint(value) for key, value in obj.items() if isinstance(value, pd.DataFrame)}
+    if isinstance(obj, pd.DataFrame):
+        return (tuple(obj.columns), tuple(obj.dtypes.astype(str)), int(pd.util.hash_pandas_object(obj).sum()))
+    return None
+
+class InvestmentDataset:
+    """Normalized, typed view of one workbook version
+
+    Each table (investors, daily_report, daily_profits, reinvestments, charges) is
+    normalized on first access and then shared by every session.
+    
+    Given the `previous` version, append-only tables reuse its rows up to the last ingested
+    (Date, UserID) and only parse, normalize and index what was added after it.
+    """
+    
+    def __init__(self, sheets, version, previous=None):
+        self.sheets = sheets
+        self.version = version
+        self._previous = previous
+        self._watermarks = {}
+        self._appended = {}
+        self._tables = {}
+        self._user_indexes = {}
+        self._derived = {}
+        self._fingerprints = {}
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._build_locks = {}
+    
+    def _build_lock(self, key):
+        """Lock for building one table, index or derived table, so that a session only waits
+        for the ones it reads (e.g. not for Daily_Profits_Calculations while it is warmed)"""
+        with self._lock:
+            return self._build_locks.setdefault(key, threading.RLock())
+    
+    def table(self, table_name):
+        """Normalized DataFrame for one of the TABLE_SCHEMAS entries"""
+        with self._build_lock(('table', table_name)):
+            if table_name not in self._tables:
+                schema = TABLE_SCHEMAS[table_name]
+                sheet_name = next((name for name in schema['sheets'] if name in self.sheets), None)
+                table = None
+                if sheet_name is None:
+                    table = empty_table(schema)
+                elif table_name in APPEND_ONLY_TABLES and self._previous is not None:
+                    table = self._append_new_rows(table_name, schema, sheet_name)
+                if table is None:
+                    raw = self.sheets[sheet_name]
+                    table = normalize_table(raw, schema, table_name)
+                    self._memory[table_name] = {
+                        'sheet': sheet_name,
+                        'rows': len(table),
+                        'raw_bytes': int(raw.memory_usage(deep=True).sum()),
+                        'compact_bytes': int(table.memory_usage(deep=True).sum()),
+                    }
+                if table_name in APPEND_ONLY_TABLES and not table.empty:
+                    appended = self._appended.get(table_name)
+                    self._watermarks[table_name] = ingest_watermark(table, start=appended[1]['row'] if appended else 0)
+                self._publish(('table', table_name), table)
+                self._tables[table_name] = table
+            return self._tables[table_name]
+    
+    def _append_new_rows(self, table_name, schema, sheet_name):
+        """Previous version's table plus the rows added since its watermark, or None to parse in full"""
+        previous = self._previous
+        previous_table = previous.table(table_name)
+        watermark = previous.watermark(table_name)
+        if watermark is None:
+            return None
+        
+        cut = watermark['row']
+        raw = self.sheets.read_rows_from(sheet_name, cut, columns_above=MUTABLE_COLUMNS)
+        if raw is None or raw[1].empty:
+            return None
+        raw_above, raw_tail = raw
+        # A Total_Profit derived from per-user profits needs the whole day, not just the new rows
+        if table_name == 'daily_report' and not any(alias in raw_tail.columns for alias in TOTAL_PROFIT_ALIASES):
+            return None
+        try:
+            tail = normalize_table(raw_tail, schema, table_name)
+        except ValueError:
+            return None
+        
+        # The watermark row must still be where it was, and new rows may not go back in time -
+        # anything else means the history was edited and the sheet has to be parsed in full
+        if (list(tail.columns) != list(previous_table.columns)
+                or tail['Date'].iat[0] != watermark['date'] or tail['UserID'].iat[0] != watermark['user']
+                or (tail['Date'] < watermark['date']).any()):
+            return None
+        
+        table = append_table(previous_table.iloc[:cut], tail)
+        
+        # Rows above the watermark keep everything but the columns edited in place, which are
+        # re-read for every row and typed over the whole column, as a full parse would
+        if len(raw_above.columns):
+            if len(raw_above) != cut:
+                return None
+            raw_tail_columns = raw_tail.rename(columns=lambda col: str(col).strip())[raw_above.columns]
+            raw_columns = pd.concat([raw_above, raw_tail_columns]).reset_index(drop=True)
+            fresh = coerce_columns(raw_columns.infer_objects(), schema)
+            for col in fresh.columns:
+                table[col] = fresh[col].array
+        self._appended[table_name] = (previous, watermark)
+        previous_memory = previous._memory.get(table_name, {})
+        self._memory[table_name] = {
+            'sheet': sheet_name,
+            'rows': len(table),
+            'raw_bytes': previous_memory.get('raw_bytes', 0) + int(raw_tail.memory_usage(deep=True).sum()),
+            'compact_bytes': int(table.memory_usage(deep=True).sum()),
+        }
+        return table
+    
+    def watermark(self, table_name):
+        """Last ingested (Date, UserID) of an append-only table (see ingest_watermark)"""
+        self.table(table_name)
+        return self._watermarks.get(table_name)
+    
+    def appended_since(self, table_name):
+        """(previous dataset, its watermark) when this table was built by appending, else None"""
+        return self._appended.get(table_name)
+    
+    def release_previous(self):
+        """Drop the link to the previous version once everything has been built from it"""
+        with self._lock:
+            self._previous = None
+            self._appended = {}
+    
+    def user_index(self, table_name):
+        """Row positions of every user's rows in a table ({UserID: ndarray}), built once per version"""
+        with self._build_lock(('user_index', table_name)):
+            if table_name not in self._user_indexes:
+                df = self.table(table_name)
+                appended = self.appended_since(table_name)
+                if df.empty:
+                    self._user_indexes[table_name] = {}
+                elif appended is not None:
+                    self._user_indexes[table_name] = freeze_data(self._append_user_index(table_name, *appended))
+                else:
+                    self._user_indexes[table_name] = freeze_data(df.groupby('UserID', observed=True, sort=False).indices)
+            return self._user_indexes[table_name]
+    
+    def _append_user_index(self, table_name, previous, watermark):
+        """Extend the previous version's user index with the appended rows only"""
+        cut = watermark['row']
+        index = {}
+        for user_id, positions in previous.user_index(table_name).items():
+            kept = positions[:np.searchsorted(positions, cut)]
+            if len(kept):
+                index[user_id] = kept
+        
+        tail = self.table(table_name).iloc[cut:]
+        for user_id, positions in tail.groupby('UserID', observed=True, sort=False).indices.items():
+            positions = positions + cut
+            index[user_id] = np.concatenate([index[user_id], positions]) if user_id in index else positions
+        return index
+    
+    def user_rows(self, table_name, user_id):
+        """One user's rows of a table in sheet order - O(rows for that user) instead of a full scan"""
+        df = self.table(table_name)
+        positions = self.user_index(table_name).get(user_id)
+        if positions is None:
+            return df.iloc[0:0]
+        return df.iloc[positions]
+    
+    def derived(self, name, build):
+        """Memoize a table derived from this version's data - build(dataset) runs once and is shared"""
+        with self._build_lock(('derived', name)):
+            if name not in self._derived:
+                value = build(self)
+                self._publish(('derived', name), value)
+                self._derived[name] = value
+            return self._derived[name]
+    
+    def _publish(self, key, value):
+        """Lock a table before sessions can see it (and remember its content in strict mode)"""
+        freeze_data(value)
+        if STRICT_DATA_CHECKS:
+            self._fingerprints[key] = data_fingerprint(value)
+    
+    def memory_report(self):
+        """Per-sheet memory before (as parsed) and after normalization/compaction"""
+        report = pd.DataFrame.from_dict(self._memory, orient='index',
+                                        columns=['sheet', 'rows', 'raw_bytes', 'compact_bytes'])
+        report.index.name = 'table'
+        report['saved_pct'] = (1 - report['compact_bytes'] / report['raw_bytes']) * 100
+        return report
+    
+    def modified_tables(self):
+        """Tables whose content changed since they were published (needs DASHBOARD_STRICT_DATA=1)"""
+        # Copies, as other threads may be publishing tables meanwhile
+        published = {('table', name): value for name, value in list(self._tables.items())}
+        published.update({('derived', name): value for name, value in list(self._derived.items())})
+        return [f"{kind}:{name}" for (kind, name), fingerprint in list(self._fingerprints.items())
+                if (kind, name) in published and data_fingerprint(published[(kind, name)]) != fingerprint]
+    
+    @property
+    def investors(self):
+        return self.table('investors')
+    
+    @property
+    def daily_report(self):
+        return self.table('daily_report')
+    
+    @property
+    def daily_profits(self):
+        return self.table('daily_profits')
+    
+    @property
+    def reinvestments(self):
+        return self.table('reinvestments')
+    
+    @property
+    def charges(self):
+        return self.table('charges')
+
+def open_dataset(path, content_hash, previous=None):
+    """Dataset for a workbook version (tables are parsed lazily on first access)"""
+    return InvestmentDataset(WorkbookSheets(path, content_hash), version=content_hash, previous=previous)
+
+class SQLiteStore:
+    """In-memory SQLite copy of one dataset version for indexed per-user queries
+    
+    Every row keeps its position in the normalized table as row_id, so queries only select
+    row ids through the indexes and the rows themselves are taken from the shared DataFrames
+    (same columns and dtypes as the pandas path). Each thread gets its own connection to the
+    shared-cache database, so sessions can query concurrently.
+    """
+    
+    DAILY_REPORT_COLUMNS = ['UserID', 'Date', 'Payment', 'Invest_Amount', 'Company_Total_Invest',
+                            'Profit', 'Total_Profit']
+    _database_ids = itertools.count()
+    
+    def __init__(self, data, previous=None):
+        self.version = data.version
+        self._uri = f"file:investments-{data.version[:16]}-{next(self._database_ids)}?mode=memory&cache=shared"
+        self._local = threading.local()
+        # The database lives as long as this connection is open
+        self._owner = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        
+        appended = data.appended_since('daily_report') if previous is not None else None
+        with self._owner:
+            if appended is not None:
+                # Start from the previous version's database and only insert the appended rows
+                # (and update the older rows whose edited-in-place columns changed)
+                previous._owner.backup(self._owner)
+                previous_data, watermark = appended
+                self._owner.execute("DELETE FROM daily_report WHERE row_id >= ?", (watermark['row'],))
+                self._update_daily_report(previous_data.daily_report, data.daily_report, watermark['row'])
+                self._insert_daily_report(data.daily_report, start=watermark['row'])
+            else:
+                self._create_daily_report(data.daily_report)
+            for table_name in ['reinvestments', 'charges']:
+                self._owner.execute(f"DROP TABLE IF EXISTS {table_name}")
+                self._owner.execute(f"CREATE TABLE {table_name} (row_id INTEGER PRIMARY KEY, UserID TEXT)")
+                self._owner.execute(f"CREATE INDEX {table_name}_user ON {table_name} (UserID)")
+                self._owner.executemany(f"INSERT INTO {table_name} VALUES (?, ?)",
+                                        self._rows(data.table(table_name), ['UserID']))
+        self.has_company_total = 'Company_Total_Invest' in data.daily_report.columns
+    
+    @staticmethod
+    def _rows(df, columns, start=0):
+        """(row_id, *columns) tuples for SQLite, dates as int64 nanoseconds and NaN/NaT as NULL"""
+        values = [np.arange(start, start + len(df)).tolist()]
+        for col in columns:
+            if col not in df.columns:
+                values.append([None] * len(df))
+                continue
+            series = df[col]
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                as_int = series.to_numpy(dtype='datetime64[ns]').view('i8').astype(object)
+                as_int[series.isna().to_numpy()] = None
+                values.append(as_int.tolist())
+            elif pd.api.types.is_float_dtype(series.dtype):
+                values.append(series.astype(object).where(series.notna(), None).tolist())
+            else:
+                values.append(series.astype(object).where(series.notna(), None).map(
+                    lambda value: value if value is None else str(value)).tolist())
+        return zip(*values)
+    
+    def _create_daily_report(self, daily_report_df):
+        self._owner.execute("""CREATE TABLE daily_report (
+            row_id INTEGER PRIMARY KEY, UserID TEXT, Date INTEGER, Payment TEXT,
+            Invest_Amount REAL, Company_Total_Invest REAL, Profit REAL, Total_Profit REAL)""")
+        self._owner.execute("CREATE INDEX daily_report_user_date ON daily_report (UserID, Date)")
+        self._owner.execute("CREATE INDEX daily_report_user_payment ON daily_report (UserID, Payment)")
+        self._owner.execute("CREATE INDEX daily_report_date ON daily_report (Date)")
+        self._insert_daily_report(daily_report_df)
+    
+    def _insert_daily_report(self, daily_report_df, start=0):
+        self._owner.executemany(
+            "INSERT INTO daily_report VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            self._rows(daily_report_df.iloc[start:], self.DAILY_REPORT_COLUMNS, start=start)
+        )
+    
+    def _update_daily_report(self, previous_df, daily_report_df, stop):
+        """Rewrite the edited-in-place columns of rows before `stop` whose values changed"""
+        for col in self.DAILY_REPORT_COLUMNS:
+            if col not in MUTABLE_COLUMNS or col not in daily_report_df.columns:
+                continue
+            old = previous_df[col].iloc[:stop].astype(object)
+            new = daily_report_df[col].iloc[:stop].astype(object)
+            changed = np.flatnonzero((old != new).to_numpy() & ~(old.isna() & new.isna()).to_numpy())
+            if len(changed):
+                values = new.iloc[changed]
+                self._owner.executemany(
+                    f"UPDATE daily_report SET {col} = ? WHERE row_id = ?",
+                    zip(values.where(values.notna(), None).map(lambda value: value if value is None else str(value)),
+                        changed.tolist())
+                )
+    
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+            self._local.connection = connection
+        return connection
+    
+    def row_ids(self, sql, params=()):
+        """Run a query that selects row_id and return the ids as an int array"""
+        rows = self._connection().execute(sql, params).fetchall()
+        return np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    
+    def user_profit_rows(self, user_id, date_range=None, payment_status=None):
+        """Row ids of a user's Daily_Report rows, newest first (rows without a date last)"""
+        sql = "SELECT row_id FROM daily_report WHERE UserID = ?"
+        params = [str(user_id)]
+        if date_range is not None:
+            sql += " AND Date BETWEEN ? AND ?"
+            params += [pd.Timestamp(date_range[0]).value, pd.Timestamp(date_range[1]).value]
+        if payment_status:
+            sql += " AND Payment = ?"
+            params.append(str(payment_status))
+        # Same order as the pandas path: within a date, later sheet rows first
+        sql += " ORDER BY Date IS NULL, Date DESC, CASE WHEN Date IS NULL THEN row_id ELSE -row_id END"
+        return self.row_ids(sql, params)
+    
+    def user_rows(self, table_name, user_id):
+        """Row ids of a user's rows in sheet order ('reinvestments' or 'charges')"""
+        return self.row_ids(f"SELECT row_id FROM {table_name} WHERE UserID = ? ORDER BY row_id", (str(user_id),))
+    
+    def company_daily(self):
+        """Company daily figures per date (the columns of company_daily_rows)"""
+        company_total = "first.Company_Total_Invest" if self.has_company_total else "days.invested"
+        sql = f"""
+            WITH days AS (
+                SELECT Date, MIN(row_id) AS first_row, TOTAL(MAX(Profit, 0)) AS positive_profit,
+                       COUNT(DISTINCT UserID) AS investor_count, TOTAL(Invest_Amount) AS invested
+                FROM daily_report WHERE Date IS NOT NULL GROUP BY Date
+            )
+            SELECT days.Date, {company_total}, first.Total_Profit, days.positive_profit, days.investor_count
+            FROM days JOIN daily_report AS first ON first.row_id = days.first_row
+            ORDER BY days.Date
+        """
+        return self._connection().execute(sql).fetchall()
+
+def build_sqlite_store(data):
+    """SQLite copy of a dataset version (extends the previous version's copy after an append)"""
+    appended = data.appended_since('daily_report')
+    previous = appended[0].derived('sqlite_store', build_sqlite_store) if appended is not None else None
+    return SQLiteStore(data, previous=previous)
+
+def get_query_store(data):
+    """The SQLite store for a dataset when DASHBOARD_QUERY_BACKEND=sqlite, otherwise None"""
+    if QUERY_BACKEND != 'sqlite':
+        return None
+    return data.derived('sqlite_store', build_sqlite_store)
+
+class DataRefresher:
+    """Keeps the latest dataset loaded and revalidates it in a background thread
+
+    Sessions are always served `current` (stale-while-revalidate): a new workbook
+    version is fetched, parsed and warmed off the request path and then swapped
+    in with a single assignment, so no page load ever waits on a download.
+    
+    The first version in a process has nothing to replace, so it is published as soon as
+    it is opened (its tables are parsed as pages read them) and warmed by the thread.
+    """
+    
+    def __init__(self, interval=REFRESH_INTERVAL_SECONDS):
+        self.interval = interval
+        self.current = None
+        self.source = None
+        self.loaded_at = None
+        self.checked_at = None
+        self.last_error = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._unwarmed = None
+        self._thread = None
+    
+    def refresh(self):
+        """Revalidate the workbook and swap in a new dataset if its content changed"""
+        with self._refresh_lock:
+            workbook_path, source = fetch_workbook()
+            checked_at = time.time()
+            
+            current = self.current
+            if current is not None and source == 'not-modified':
+                # The source answered, so an earlier offline / failed check no longer applies
+                self.source = source
+                self.checked_at = checked_at
+                self.last_error = None
+                return current
+            
+            content_hash = file_content_hash(workbook_path)
+            if current is not None and current.version == content_hash:
+                self.source = source
+                self.checked_at = checked_at
+                self.last_error = None
+                return current
+            
+            if current is None:
+                # Nothing to serve yet - publish the lazily opened version right away, so the
+                # first page only waits for the tables it reads, and warm the rest in the thread
+                dataset = open_dataset(workbook_path, content_hash)
+                self._unwarmed = dataset
+                self._wake.set()
+            else:
+                # Parse and build everything the dashboard needs before publishing the new version
+                # (append-only sheets only ingest the rows added since the current version)
+                dataset = open_dataset(workbook_path, content_hash,
+                                       previous=current if INCREMENTAL_INGEST else None)
+                warm_dataset(dataset)
+                dataset.release_previous()
+            
+            self.source = source
+            self.loaded_at = checked_at
+            self.checked_at = checked_at
+            self.last_error = None
+            self.current = dataset
+            return dataset
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            unwarmed, self._unwarmed = self._unwarmed, None
+            if unwarmed is not None:
+                try:
+                    warm_dataset(unwarmed)
+                except Exception as e:
+                    # Pages still build what they read on demand; the error shows up in the data status
+                    self.last_error = str(e)
+                continue
+            # Woken early for a first version to warm (or to stop)
+            if self._wake.wait(self.interval):
+                continue
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous version; the error shows up in the data status
+                self.last_error = str(e)
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='investment-data-refresher', daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+    
+    def status(self):
+        """Version and age of the data being served"""
+        now = time.time()
+        return {
+            'version': self.current.version[:12] if self.current is not None else None,
+            'source': self.source,
+            'age_seconds': now - self.loaded_at if self.loaded_at else None,
+            'checked_seconds_ago': now - self.checked_at if self.checked_at else None,
+            'last_error': self.last_error,
+        }
+
+_data_refresher = None
+_data_refresher_lock = threading.Lock()
+
+def get_data_refresher():
+    """Process-wide data refresher (one background thread shared by all sessions)"""
+    global _data_refresher
+    with _data_refresher_lock:
+        if _data_refresher is None:
+            _data_refresher = DataRefresher()
+            _data_refresher.start()
+        return _data_refresher
+
+@timed_function
+def compute_investor_metrics(data):
+    """Metrics for every investor in one vectorized pass (indexed by UserID)"""
+    investor_df = data.investors
+    investor_df = investor_df[investor_df['UserID'].notna()].drop_duplicates(subset=['UserID'], keep='first')
+    
+    metrics_df = pd.DataFrame({
+        'name': investor_df['Name'].to_numpy(),
+        'total_investment': investor_df['Total_Invested_Amount'].to_numpy(dtype='float64'),
+        'total_profit': investor_df['Total Profit Earned'].fillna(0).to_numpy(dtype='float64'),
+    }, index=pd.Index(investor_df['UserID'], name='UserID'))
+    
+    # ROI (0 when nothing is invested)
+    investment = metrics_df['total_investment'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics_df['roi'] = np.where(investment > 0, metrics_df['total_profit'].to_numpy() / investment * 100, 0.0)
+    
+    # Average daily profit over positive days only, and expected monthly returns (average × 30)
+    daily_report_df = data.daily_report
+    positive = daily_report_df[daily_report_df['Profit'] > 0]
+    avg_daily = positive.groupby('UserID', observed=True)['Profit'].mean()
+    metrics_df['avg_daily_profit'] = avg_daily.reindex(metrics_df.index).fillna(0).to_numpy()
+    metrics_df['expected_monthly'] = metrics_df['avg_daily_profit'] * 30
+    
+    return metrics_df
+
+def get_investor_metrics(data):
+    """All-investor metrics table, computed once per data version"""
+    return data.derived('investor_metrics', compute_investor_metrics)
+
+@timed_function
+def build_company_daily(data):
+    """Company-level daily table, one row per date (ascending)
+
+    Columns: company_total_invest and total_profit (the company figures recorded on each
+    date's first row), positive_profit (sum of positive per-user profits), investor_count
+    and cumulative_profit.
+    """
+    daily_report_df = data.daily_report
+    appended = data.appended_since('daily_report')
+    store = get_query_store(data)
+    if store is not None or appended is None:
+        if store is not None:
+            company_daily = company_daily_query(store, daily_report_df)
+        else:
+            company_daily = company_daily_rows(daily_report_df)
+        company_daily['cumulative_profit'] = company_daily['total_profit'].fillna(0).cumsum()
+        return company_daily
+    
+    # Only the last ingested date and the dates after it can have changed
+    previous, watermark = appended
+    kept = get_company_daily(previous)
+    kept = kept.iloc[:kept.index.searchsorted(watermark['date'])]
+    new_days = company_daily_rows(daily_report_df.iloc[watermark['day_start']:])
+    carried = kept['cumulative_profit'].to_numpy()[-1:] if len(kept) else np.zeros(1)
+    new_days['cumulative_profit'] = np.cumsum(np.r_[carried, new_days['total_profit'].fillna(0).to_numpy()])[1:]
+    return pd.concat([kept, new_days])
+
+def company_daily_rows(daily_report_df):
+    """Company daily figures for the rows given, without the running total"""
+    columns = ['company_total_invest', 'total_profit', 'positive_profit', 'investor_count']
+    daily_report_df = daily_report_df[daily_report_df['Date'].notna()] if not daily_report_df.empty else daily_report_df
+    if daily_report_df.empty:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='Date'))
+    
+    # Company figures are repeated on every user's row - take each date's first row
+    first_rows = daily_report_df[~daily_report_df['Date'].duplicated()].set_index('Date').sort_index()
+    if 'Company_Total_Invest' in first_rows.columns:
+        company_total_invest = first_rows['Company_Total_Invest']
+    else:
+        company_total_invest = daily_report_df.groupby('Date')['Invest_Amount'].sum()
+    
+    by_date = daily_report_df.groupby('Date')
+    profit = daily_report_df['Profit']
+    company_daily = pd.DataFrame({
+        'company_total_invest': company_total_invest,
+        'total_profit': first_rows['Total_Profit'],
+        'positive_profit': profit.where(profit > 0, 0.0).groupby(daily_report_df['Date']).sum(),
+        'investor_count': by_date['UserID'].nunique(),
+    })
+    return company_daily[columns]
+
+def company_daily_query(store, daily_report_df):
+    """company_daily_rows computed by the SQLite store, with the pandas path's dtypes"""
+    columns = ['company_total_invest', 'total_profit', 'positive_profit', 'investor_count']
+    rows = store.company_daily()
+    company_daily = pd.DataFrame.from_records(rows, columns=['Date'] + columns)
+    company_daily['Date'] = pd.to_datetime(company_daily['Date'].astype('int64')).astype(daily_report_df['Date'].dtype)
+    company_daily = company_daily.set_index('Date')
+    
+    # Match the dtypes the pandas path would carry over from the table
+    source_columns = {'company_total_invest': 'Company_Total_Invest', 'total_profit': 'Total_Profit',
+                      'positive_profit': 'Profit'}
+    for col, source in source_columns.items():
+        if source in daily_report_df.columns:
+            company_daily[col] = company_daily[col].astype(daily_report_df[source].dtype)
+    company_daily['investor_count'] = company_daily['investor_count'].astype('int64')
+    return company_daily
+
+def get_company_daily(data):
+    """Company daily aggregates, materialized once per data version"""
+    return data.derived('company_daily', build_company_daily)
+
+@timed_function
+def warm_dataset(data):
+    """Build every table, index and derived table the dashboard reads, before a version goes live"""
+    for table_name in TABLE_SCHEMAS:
+        data.table(table_name)
+        data.user_index(table_name)
+    get_query_store(data)
+    get_investor_metrics(data)
+    get_investor_comparison(data)
+    get_company_daily(data)
+    data.derived('user_daily_reports', build_user_daily_reports)
+    data.derived('user_profit_sums', build_user_profit_sums)
+
+@timed_function
+def calculate_user_metrics(user_id, data):
+    """Calculate all metrics for a specific user"""
+    # Look up the user's row in the all-investor metrics table
+    metrics_df = get_investor_metrics(data)
+    
+    if user_id not in metrics_df.index:
+        return None
+    
+    row = metrics_df.loc[user_id]
+    metrics = {
+        'user_id': user_id,
+        'name': row['name'],
+        'total_investment': float(row['total_investment']),
+        'total_profit': float(row['total_profit']),
+        'roi': float(row['roi']),
+        'expected_monthly': float(row['expected_monthly']),
+        'avg_daily_profit': float(row['avg_daily_profit']),
+    }
+    
+    # Get investment history
+    user_investments = data.user_rows('daily_profits', user_id)
+    user_investments = user_investments[user_investments['User_Invested_Amount'].notna()]
+    
+    metrics['investment_history'] = pd.DataFrame({
+        'date': user_investments['Date'].fillna(user_investments['Transaction_Date']),
+        'amount': user_investments['User_Invested_Amount'],
+        'transaction_id': user_investments['Transaction_ID']
+    }).to_dict('records')
+    
+    return metrics
+
+@timed_function
+def get_user_reinvestment_data(user_id, data):
+    """Get re-investment details for specific user"""
+    # Filter for user
+    store = get_query_store(data)
+    if store is not None:
+        user_reinvest = data.reinvestments.iloc[store.user_rows('reinvestments', user_id)]
+    else:
+        user_reinvest = data.user_rows('reinvestments', user_id)
+    
+    # Select only required columns
+    required_columns = ['Re-Invest_ID', 'Requested_Amount', 'Total_Added_Amount', 
+                      'Pending_Amount_To_Be_Add', 'Applied_To_Main_Investment_Status']
+    
+    # Filter only existing columns
+    available_columns = [col for col in required_columns if col in user_reinvest.columns]
+    
+    if not user_reinvest.empty and available_columns:
+        return user_reinvest[available_columns]
+    
+    return pd.DataFrame()
+
+@timed_function
+def get_user_platform_charges_data(user_id, data):
+    """Get platform charges details for specific user - SIMPLE VERSION like Re-Investment section"""
+    # Filter for user (the charges sheet name variants are resolved when the workbook is loaded)
+    store = get_query_store(data)
+    if store is not None:
+        user_charges = data.charges.iloc[store.user_rows('charges', user_id)]
+    else:
+        user_charges = data.user_rows('charges', user_id)
+    
+    # Select only required columns as specified
+    required_columns = ['Charge_ID', 'Reason_For_Charge', 'Charge_Per_Head', 'Paid_Amt', 'Pending_Amt']
+    
+    # Filter only existing columns
+    available_columns = [col for col in required_columns if col in user_charges.columns]
+    
+    if not user_charges.empty and available_columns:
+        return user_charges[available_columns]
+    
+    return pd.DataFrame()
+
+def build_investor_comparison(data):
+    """Top investors by amount invested plus ROI / profit percentile bands, once per data version"""
+    investor_df = data.investors
+    invested = investor_df['Total_Invested_Amount'].to_numpy(dtype=float)
+    profit = investor_df['Total Profit Earned'].to_numpy(dtype=float)
+    roi = np.divide(profit * 100, invested, out=np.full_like(profit, np.nan), where=invested > 0)
+    
+    # argpartition finds the top K in O(n); only those K are then sorted
+    ranked = np.nan_to_num(invested, nan=-np.inf)
+    k = min(COMPARISON_TOP_K, len(ranked))
+    top = np.argpartition(-ranked, k - 1)[:k] if len(ranked) > k else np.arange(len(ranked))
+    top = top[np.argsort(-ranked[top], kind='stable')]
+    
+    # p10 / p50 / p90 of ROI and profit across every investor in one pass (an all-NaN column
+    # gives NaN bands; nanpercentile reports that with a RuntimeWarning, not a floating-point error)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        bands = np.nanpercentile(np.column_stack([roi, profit]), [10, 50, 90], axis=0) if len(roi) else np.full((3, 2), np.nan)
+    
+    return {
+        'top': top,
+        'invested': invested,
+        'profit': profit,
+        'roi': roi,
+        'roi_bands': bands[:, 0],
+        'profit_bands': bands[:, 1],
+    }
+
+def get_investor_comparison(data):
+    """Investor comparison arrays, computed once per data version"""
+    return data.derived('investor_comparison', build_investor_comparison)
+
+@timed_function
+def build_user_daily_reports(data):
+    """Daily_Report sorted by (user, date) once, with each user's row range and a DatetimeIndex
+
+    Returns {'frame', 'dates', 'ranges'} where ranges maps UserID -> (start, dated_end, end):
+    rows start..dated_end have real dates in ascending order, dated_end..end have no date.
+    """
+    daily_report_df = data.daily_report
+    if daily_report_df.empty:
+        return {'frame': daily_report_df, 'dates': pd.DatetimeIndex([]), 'ranges': {}}
+    
+    user_ids = daily_report_df['UserID']
+    codes = user_ids.cat.codes.to_numpy()
+    dates = daily_report_df['Date'].to_numpy()
+    no_date = np.isnat(dates)
+    
+    # One stable sort by user, then dated rows before undated ones, then date
+    order = np.lexsort((dates.view('i8'), no_date, codes))
+    order = order[codes[order] >= 0]  # Drop rows without a UserID
+    sorted_df = daily_report_df.iloc[order]
+    sorted_codes = codes[order]
+    
+    ranges = {}
+    if len(order):
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        dated_counts = np.add.reduceat((~no_date[order]).astype(np.int64), starts)
+        categories = user_ids.cat.categories
+        for code, start, end, dated in zip(sorted_codes[starts], starts, ends, dated_counts):
+            ranges[categories[code]] = (int(start), int(start + dated), int(end))
+    
+    return {'frame': sorted_df, 'dates': pd.DatetimeIndex(sorted_df['Date']), 'ranges': ranges}
+
+def user_report_span(user_reports, user_id, selected_date=None):
+    """(first, stop, dated_stop) rows of user_reports['frame'] for a user and an optional date filter
+
+    Rows first..dated_stop are the dated rows in ascending date order and dated_stop..stop
+    the rows without a date (none when a date filter is given). None for unknown users.
+    """
+    if user_id not in user_reports['ranges']:
+        return None
+    start, dated_end, end = user_reports['ranges'][user_id]
+    if not selected_date:
+        return start, end, dated_end
+    
+    # Binary search on the sorted dates instead of a full mask
+    user_dates = user_reports['dates'][start:dated_end]
+    if isinstance(selected_date, list) and len(selected_date) == 2:
+        start_date, end_date = selected_date
+    else:
+        start_date = end_date = selected_date
+    lo = user_dates.searchsorted(pd.Timestamp(start_date), side='left')
+    hi = user_dates.searchsorted(pd.Timestamp(end_date), side='right')
+    return start + lo, start + hi, start + hi
+
+def user_profit_positions(user_id, data, selected_date=None, payment_status=None):
+    """The rows create_user_profit_table returns as (frame, positions into frame), without copying them
+
+    Returns None for a user with no Daily_Report rows.
+    """
+    store = get_query_store(data)
+    if store is not None:
+        if user_id not in data.user_index('daily_report'):
+            return None
+        date_range = None
+        if selected_date:
+            if isinstance(selected_date, list) and len(selected_date) == 2:
+                date_range = selected_date
+            else:
+                date_range = (selected_date, selected_date)
+        status = payment_status if payment_status and payment_status != 'All' else None
+        return data.daily_report, store.user_profit_rows(user_id, date_range, status)
+    
+    # The user's rows, pre-sorted by date (Total_Profit and Remarks are guaranteed by the load-time schema)
+    user_reports = data.derived('user_daily_reports', build_user_daily_reports)
+    span = user_report_span(user_reports, user_id, selected_date)
+    if span is None:
+        return None
+    first, stop, dated_stop = span
+    
+    # Newest first, rows without a date last
+    positions = np.r_[np.arange(dated_stop - 1, first - 1, -1), np.arange(dated_stop, stop)]
+    frame = user_reports['frame']
+    
+    # Apply payment status filter
+    if payment_status and payment_status != 'All':
+        positions = positions[(frame['Payment'].iloc[positions] == payment_status).to_numpy()]
+    
+    return frame, positions
+
+@timed_function
+def create_user_profit_table(user_id, data, selected_date=None, payment_status=None):
+    """Create filtered profit table for user"""
+    rows = user_profit_positions(user_id, data, selected_date, payment_status)
+    if rows is None:
+        return pd.DataFrame()
+    frame, positions = rows
+    return frame.iloc[positions]
+
+def build_user_profit_sums(data):
+    """Running Profit totals and counts over the user_daily_reports frame, overall and per payment status
+
+    Any user's total for a date window is then sums[stop] - sums[first] instead of a sum over the rows.
+    """
+    frame = data.derived('user_daily_reports', build_user_daily_reports)['frame']
+    profit = frame['Profit'].to_numpy(dtype=float, na_value=np.nan) if len(frame) else np.zeros(0)
+    has_profit = ~np.isnan(profit)
+    values = np.where(has_profit, profit, 0.0)
+    
+    def running(mask):
+        return {
+            'profit': np.r_[0.0, np.cumsum(np.where(mask, values, 0.0))],
+            'count': np.r_[0, np.cumsum(mask & has_profit)]
+        }
+    
+    sums = {'All': running(np.ones(len(frame), dtype=bool))}
+    if len(frame):
+        payment = frame['Payment']
+        for status in payment.dropna().unique():
+            sums[status] = running((payment == status).to_numpy())
+    return sums
+
+def user_profit_totals(user_id, data, selected_date=None, payment_status=None):
+    """(sum of Profit, rows with a Profit) over a user's filtered rows, from the precomputed running sums"""
+    user_reports = data.derived('user_daily_reports', build_user_daily_reports)
+    span = user_report_span(user_reports, user_id, selected_date)
+    sums = data.derived('user_profit_sums', build_user_profit_sums).get(payment_status or 'All')
+    if span is None or sums is None:
+        return 0.0, 0
+    first, stop, _ = span
+    return float(sums['profit'][stop] - sums['profit'][first]), int(sums['count'][stop] - sums['count'][first])
+
+def profit_table_page(frame, positions, sort_by, page_size, cursor=None):
+    """One page of a filtered profit table: (page positions, offset of the page, next cursor, previous cursor)
+
+    positions arrive newest first with undated rows last. Date orders page with a (date, rows of
+    that date already shown) cursor, so a page stays on the same days when newer days are loaded;
+    profit orders page with a plain offset. A missing cursor means the first page.
+    """
+    total = len(positions)
+    
+    if sort_by in ('profit_desc', 'profit_asc'):
+        profit = frame['Profit'].iloc[positions].to_numpy(dtype=float, na_value=np.nan)
+        # Stable, so equal profits stay newest first; rows without a profit go last either way
+        order = np.argsort(-profit if sort_by == 'profit_desc' else profit, kind='stable')
+        positions = positions[order]
+        offset = min(cursor or 0, max(total - 1, 0))
+        next_cursor = offset + page_size if offset + page_size < total else None
+        previous_cursor = max(offset - page_size, 0) if offset > 0 else None
+        return positions[offset:offset + page_size], offset, next_cursor, previous_cursor
+    
+    dates = frame['Date'].iloc[positions].to_numpy()
+    dated = int((~np.isnat(dates)).sum())
+    if sort_by == 'date_asc':
+        positions = np.r_[positions[:dated][::-1], positions[dated:]]
+        dates = np.r_[dates[:dated][::-1], dates[dated:]]
+    
+    # Ascending search keys for the dated rows, whichever way they are ordered
+    keys = dates[:dated].astype('datetime64[ns]').view('i8')
+    if sort_by != 'date_asc':
+        keys = -keys
+    
+    def offset_of(page_cursor):
+        day, skip = page_cursor
+        if day is None:
+            return dated + skip
+        key = pd.Timestamp(day).value
+        return int(np.searchsorted(keys, key if sort_by == 'date_asc' else -key, side='left')) + skip
+    
+    def cursor_at(offset):
+        if offset >= total:
+            return None
+        if offset >= dated:
+            return (None, offset - dated)
+        return (pd.Timestamp(dates[offset]), offset - int(np.searchsorted(keys, keys[offset], side='left')))
+    
+    offset = min(offset_of(cursor), max(total - 1, 0)) if cursor else 0
+    previous_cursor = cursor_at(max(offset - page_size, 0)) if offset > 0 else None
+    return positions[offset:offset + page_size], offset, cursor_at(offset + page_size), previous_cursor
@@ -0,0 +1,297 @@
+"""Vectorized profit allocation for the Daily_Report sheet
+
+Rebuilds every investor's daily profit from the company's daily Total_Profit
+and each investor's invested balance as one investors x days matrix, instead
+of the row-by-row formulas maintained by hand in Excel.
+
+    python profit_allocation.py --check
+    python profit_allocation.py --output INVESTMENT_APP_DETAILS_UPDATED.xlsx
+
+The output is a copy of the workbook with only the Daily_Report sheet replaced. Formulas
+that read Daily_Report (Investor_Details' Total Profit Earned, ...) keep the values Excel
+last calculated until the copy is opened and saved in Excel.
+"""
+
+import argparse
+import os
+import posixpath
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WORKBOOK = os.path.join(APP_DIR, "INVESTMENT_APP_DETAILS_UPDATE.xlsx")
+CALCULATIONS_SHEET = "Daily_Profits_Calculations"
+REPORT_SHEET = "Daily_Report"
+REPORT_COLUMNS = ['Date', 'UserID', 'Invest_Amount', 'Company_Total_Invest', 'Profit',
+                  'Payment', 'Total_Profit', 'Re-Invest_ID', 'Remarks']
+CARRIED_COLUMNS = ['Re-Invest_ID', 'Remarks']
+DEFAULT_PAYMENT_STATUS = "Pending"
+XLSX_NAMESPACES = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+RELATIONSHIP_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+
+def balance_matrix(user_ids, dates, deposit_users, deposit_dates, deposit_amounts):
+    """Invested balance of every investor on every day (investors x days)"""
+    user_ids = np.asarray(user_ids)
+    dates = np.asarray(dates)
+    rows = np.searchsorted(user_ids, np.asarray(deposit_users))
+    cols = np.searchsorted(dates, np.asarray(deposit_dates))
+
+    # A deposit made after the last profit day never earns anything in this window
+    keep = cols < len(dates)
+    flows = np.zeros((len(user_ids), len(dates)))
+    np.add.at(flows, (rows[keep], cols[keep]), np.asarray(deposit_amounts, dtype=float)[keep])
+    return np.cumsum(flows, axis=1)
+
+def allocate_profits(balances, total_profit, payout_ratio=1.0):
+    """Split each day's company profit across investors by their share of the invested total"""
+    balances = np.asarray(balances, dtype=float)
+    total_profit = np.asarray(total_profit, dtype=float)
+
+    company_total = balances.sum(axis=0)
+    share = np.divide(balances, company_total, out=np.zeros_like(balances), where=company_total > 0)
+    profit = share * total_profit * np.asarray(payout_ratio, dtype=float)
+
+    return {
+        'company_total': company_total,
+        'share': share,
+        'profit': profit
+    }
+
+def allocation_inputs(calculations):
+    """Daily totals, deposits and payout ratios from the Daily_Profits_Calculations sheet"""
+    calc = calculations.dropna(subset=['Date', 'UserID']).copy()
+    calc['Date'] = pd.to_datetime(calc['Date'], errors='coerce')
+    calc = calc.dropna(subset=['Date'])
+    calc['UserID'] = calc['UserID'].astype(str).str.strip()
+
+    user_ids = np.sort(calc['UserID'].unique())
+    daily = calc.groupby('Date', sort=True)['Total_Profit'].first()
+    dates = daily.index.values
+
+    deposits = calc[pd.to_numeric(calc['User_Invested_Amount'], errors='coerce').notna()]
+    balances = balance_matrix(
+        user_ids, dates,
+        deposits['UserID'].values,
+        deposits['Date'].values,
+        pd.to_numeric(deposits['User_Invested_Amount']).values
+    )
+
+    # Payout ratio (after tax deduction) and payment status are recorded per investor per day
+    rows = np.searchsorted(user_ids, calc['UserID'].values)
+    cols = np.searchsorted(dates, calc['Date'].values)
+    payout = np.ones_like(balances)
+    if 'Tax_Deduction_%' in calc.columns:
+        payout[rows, cols] = pd.to_numeric(calc['Tax_Deduction_%'], errors='coerce').fillna(1.0).values
+    status = np.full(balances.shape, DEFAULT_PAYMENT_STATUS, dtype=object)
+    if 'Payment_Status' in calc.columns:
+        status[rows, cols] = calc['Payment_Status'].fillna(DEFAULT_PAYMENT_STATUS).values
+
+    return {
+        'user_ids': user_ids,
+        'dates': dates,
+        'total_profit': daily.fillna(0).values,
+        'balances': balances,
+        'payout_ratio': payout,
+        'payment_status': status
+    }
+
+def build_daily_report(calculations, previous_report=None):
+    """Daily_Report rows for the full history, recomputed from the calculations sheet"""
+    inputs = allocation_inputs(calculations)
+    allocation = allocate_profits(inputs['balances'], inputs['total_profit'], inputs['payout_ratio'])
+
+    # Loss days go to Loss_Recovery, so only profitable days and funded investors are reported
+    active = (inputs['balances'] > 0) & (inputs['total_profit'] >= 0)
+    cols, rows = np.nonzero(active.T)
+
+    report = pd.DataFrame({
+        'Date': inputs['dates'][cols],
+        'UserID': inputs['user_ids'][rows],
+        'Invest_Amount': inputs['balances'][rows, cols],
+        'Company_Total_Invest': allocation['company_total'][cols],
+        'Profit': allocation['profit'][rows, cols],
+        'Payment': inputs['payment_status'][rows, cols],
+        'Total_Profit': inputs['total_profit'][cols]
+    })
+
+    # Re-investment links and remarks are typed by hand, so keep whatever the sheet already has
+    if previous_report is not None and all(col in previous_report.columns for col in ['Date', 'UserID']):
+        previous = previous_report.dropna(subset=['Date', 'UserID']).copy()
+        previous['Date'] = pd.to_datetime(previous['Date'], errors='coerce')
+        previous['UserID'] = previous['UserID'].astype(str).str.strip()
+        carried = [col for col in CARRIED_COLUMNS if col in previous.columns]
+        previous = previous.drop_duplicates(['Date', 'UserID'])[['Date', 'UserID'] + carried]
+        report = report.merge(previous, on=['Date', 'UserID'], how='left')
+
+    for col in CARRIED_COLUMNS:
+        if col not in report.columns:
+            report[col] = None
+
+    return report[REPORT_COLUMNS]
+
+def with_day_separators(report):
+    """Insert the blank row the sheet keeps between days"""
+    if report.empty:
+        return report
+    day_start = np.flatnonzero(report['Date'].ne(report['Date'].shift()).values)[1:]
+    positions = np.insert(np.arange(len(report)), day_start, -1)
+    spaced = report.iloc[np.where(positions >= 0, positions, 0)].reset_index(drop=True)
+    spaced.loc[positions < 0, :] = None
+    return spaced
+
+def part_name(folder, target):
+    """Zip member a relationship target points at"""
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(folder, target))
+
+def related_parts(archive, part, kind):
+    """{relationship id: zip member} for one kind of relationship of a package part"""
+    folder, name = posixpath.split(part)
+    rels = posixpath.join(folder, '_rels', name + '.rels')
+    if rels not in archive.namelist():
+        return {}
+    root = ElementTree.fromstring(archive.read(rels))
+    return {rel.get('Id'): part_name(folder, rel.get('Target'))
+            for rel in root.iterfind('rel:Relationship', XLSX_NAMESPACES) if rel.get('Type').endswith('/' + kind)}
+
+def worksheet_part(archive, sheet_name):
+    """Zip member holding a sheet's XML"""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    for sheet in workbook.iterfind('main:sheets/main:sheet', XLSX_NAMESPACES):
+        if sheet.get('name') == sheet_name:
+            return related_parts(archive, 'xl/workbook.xml', 'worksheet')[sheet.get(RELATIONSHIP_ID)]
+    raise ValueError(f"The workbook has no {sheet_name} sheet")
+
+def cell_xml(ref, value, style):
+    """One <c> element (empty for a missing value); text is written inline"""
+    if value is None or pd.isna(value):
+        return ''
+    style = f' s="{style}"' if style else ''
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        serial = (pd.Timestamp(value) - EXCEL_EPOCH) / pd.Timedelta(days=1)
+        return f'<c r="{ref}"{style}><v>{serial!r}</v></c>'
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return f'<c r="{ref}"{style}><v>{value.item() if isinstance(value, np.generic) else value!r}</v></c>'
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+def report_sheet_xml(sheet_xml, header, report):
+    """The Daily_Report worksheet XML with its data rows replaced by `report`
+
+    The header row, column widths and views are kept as they are and every column keeps the
+    cell style of the sheet's first data row, so only the values change.
+    """
+    first_row = re.search(r'<row [^>]*?r="2"[^>]*>(.*?)</row>', sheet_xml, re.S)
+    styles = dict(re.findall(r'<c r="([A-Z]+)2" s="(\d+)"', first_row.group(1) if first_row else ''))
+    header_row = re.search(r'<row [^>]*?r="1"[^>]*>.*?</row>', sheet_xml, re.S)
+
+    letters = {col: get_column_letter(position + 1) for position, col in enumerate(header) if col in REPORT_COLUMNS}
+    rows = [header_row.group(0) if header_row else '']
+    for number, values in enumerate(with_day_separators(report)[list(letters)].itertuples(index=False), start=2):
+        cells = ''.join(cell_xml(f"{letter}{number}", value, styles.get(letter))
+                        for letter, value in zip(letters.values(), values))
+        rows.append(f'<row r="{number}">{cells}</row>')
+
+    last_ref = f"{get_column_letter(len(header))}{max(len(rows), 2)}"
+    sheet_xml = re.sub(r'<sheetData\s*/>|<sheetData>.*?</sheetData>',
+                       lambda match: f"<sheetData>{''.join(rows)}</sheetData>", sheet_xml, count=1, flags=re.S)
+    return re.sub(r'<dimension ref="[^"]*"/>', f'<dimension ref="A1:{last_ref}"/>', sheet_xml, count=1), last_ref
+
+def write_daily_report(report, workbook_path, output_path):
+    """Copy the workbook to `output_path` with the Daily_Report sheet replaced
+
+    Every other part of the file is copied byte for byte, so the formulas and cached values
+    on the other sheets survive; openpyxl would drop those cached values on save. The copy is
+    marked for a full recalculation when Excel next opens it.
+    """
+    if os.path.abspath(output_path) == os.path.abspath(workbook_path) or (
+            os.path.exists(output_path) and os.path.samefile(output_path, workbook_path)):
+        raise ValueError("The output must be a new file; the source workbook is never overwritten")
+
+    header = [str(col).strip() for col in pd.read_excel(workbook_path, sheet_name=REPORT_SHEET, nrows=0).columns]
+    missing = [col for col in REPORT_COLUMNS if col not in header]
+    if missing:
+        raise ValueError(f"{REPORT_SHEET} is missing the column(s) {', '.join(missing)}")
+
+    with zipfile.ZipFile(workbook_path) as source:
+        sheet_part = worksheet_part(source, REPORT_SHEET)
+        table_parts = set(related_parts(source, sheet_part, 'table').values())
+        sheet_xml, last_ref = report_sheet_xml(source.read(sheet_part).decode('utf-8'), header, report)
+
+        folder = os.path.dirname(os.path.abspath(output_path))
+        handle, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=folder)
+        os.close(handle)
+        try:
+            with zipfile.ZipFile(temp_path, 'w') as output:
+                for info in source.infolist():
+                    data = source.read(info)
+                    if info.filename == sheet_part:
+                        data = sheet_xml.encode('utf-8')
+                    elif info.filename in table_parts:
+                        data = re.sub(rb' ref="A1:[A-Z]+\d+"', f' ref="A1:{last_ref}"'.encode(), data)
+                    elif info.filename == 'xl/workbook.xml' and b'fullCalcOnLoad' not in data:
+                        data = re.sub(rb'<calcPr\b', b'<calcPr fullCalcOnLoad="1"', data, count=1)
+                    output.writestr(info, data)
+            os.replace(temp_path, output_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    return output_path
+
+def compare_reports(computed, existing):
+    """Rows where the recomputed profit disagrees with the sheet"""
+    existing = existing.dropna(subset=['Date', 'UserID']).copy()
+    existing['Date'] = pd.to_datetime(existing['Date'], errors='coerce')
+    existing['UserID'] = existing['UserID'].astype(str).str.strip()
+    merged = computed.merge(existing, on=['Date', 'UserID'], how='outer',
+                            suffixes=('', '_sheet'), indicator=True)
+    diff = (merged['Profit'] - pd.to_numeric(merged['Profit_sheet'], errors='coerce')).abs()
+    return merged[(merged['_merge'] != 'both') | (diff > 0.01)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute the Daily_Report sheet from Daily_Profits_Calculations")
+    parser.add_argument("--workbook", default=DEFAULT_WORKBOOK, help="source workbook")
+    parser.add_argument("--output", help="new workbook to write (required unless --check; the source is never overwritten)")
+    parser.add_argument("--check", action="store_true", help="compare against the current sheet without writing")
+    args = parser.parse_args(argv)
+    if not args.check and not args.output:
+        parser.error("--output is required unless --check is given")
+
+    sheets = pd.read_excel(args.workbook, sheet_name=[CALCULATIONS_SHEET, REPORT_SHEET])
+
+    started = time.perf_counter()
+    report = build_daily_report(sheets[CALCULATIONS_SHEET], sheets[REPORT_SHEET])
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"Allocated {report['UserID'].nunique()} investors x {report['Date'].nunique()} days "
+          f"({len(report)} rows) in {elapsed_ms:.1f} ms")
+
+    if args.check:
+        mismatches = compare_reports(report, sheets[REPORT_SHEET])
+        if mismatches.empty:
+            print("Daily_Report matches the recomputed allocation")
+            return 0
+        print(f"{len(mismatches)} row(s) differ from the current Daily_Report:")
+        print(mismatches[['Date', 'UserID', 'Invest_Amount', 'Profit', 'Profit_sheet']].to_string(index=False))
+        return 1
+
+    path = write_daily_report(report, args.workbook, args.output)
+    print(f"Wrote {REPORT_SHEET} to {path}")
+    print("Formulas that read Daily_Report (e.g. Investor_Details' Total Profit Earned) still hold their old "
+          "values: open and save the file in Excel to recalculate it before the dashboard reads it")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""fetch_workbook against a local HTTP server: download, revalidate, then fall back offline
+
+    python -m pytest tests
+"""
+
+import http.server
+import os
+import sys
+import threading
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import investment_data
+
+WORKBOOK_BYTES = b"workbook version 1"
+ETAG = '"v1"'
+LAST_MODIFIED = "Sat, 17 Oct 2026 09:00:00 GMT"
+
+class WorkbookHandler(http.server.BaseHTTPRequestHandler):
+    """Serves WORKBOOK_BYTES with validators and answers 304 when the client already has it"""
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        self.send_header('Content-Length', str(len(WORKBOOK_BYTES)))
+        self.end_headers()
+        self.wfile.write(WORKBOOK_BYTES)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    WorkbookHandler.requests = []
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), WorkbookHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    thread.join()
+
+def workbook_url(httpd):
+    return f"http://127.0.0.1:{httpd.server_address[1]}/{investment_data.EXCEL_FILE_NAME}"
+
+def test_download_revalidate_then_fall_back_to_the_cache(tmp_path, server):
+    url, cache_dir = workbook_url(server), str(tmp_path / "cache")
+
+    path, source = investment_data.fetch_workbook(url, cache_dir, timeout=5)
+    assert source == 'downloaded'
+    with open(path, 'rb') as f:
+        assert f.read() == WORKBOOK_BYTES
+    assert 'If-None-Match' not in WorkbookHandler.requests[-1]
+
+    path, source = investment_data.fetch_workbook(url, cache_dir, timeout=5)
+    assert source == 'not-modified'
+    assert WorkbookHandler.requests[-1]['If-None-Match'] == ETAG
+    assert WorkbookHandler.requests[-1]['If-Modified-Since'] == LAST_MODIFIED
+
+    # Server gone: the last good copy is used
+    server.shutdown()
+    server.server_close()
+    path, source = investment_data.fetch_workbook(url, cache_dir, timeout=5)
+    assert source == 'cached'
+    with open(path, 'rb') as f:
+        assert f.read() == WORKBOOK_BYTES
+
+def test_bundled_workbook_when_offline_with_an_empty_cache(tmp_path, server):
+    url = workbook_url(server)
+    server.shutdown()
+    server.server_close()
+
+    path, source = investment_data.fetch_workbook(url, str(tmp_path / "empty"), timeout=5)
+    assert source == 'bundled'
+    assert path == investment_data.BUNDLED_EXCEL_PATH
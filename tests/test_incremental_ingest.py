@@ -0,0 +1,101 @@
+"""A workbook version built by appending onto the previous one must match a full parse
+
+    python -m pytest tests
+
+The bundled workbook's sheets are written back out as plain values, then changed the way the
+real sheet changes between versions: a new day at the bottom and, above the last ingested
+row, payouts that move Pending rows to Completed.
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import investment_data
+
+DAILY_SHEETS = {'Daily_Report': 'Payment', 'Daily_Profits_Calculations': 'Payment_Status'}
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(investment_data, 'SNAPSHOT_DIR', str(tmp_path / "snapshots"))
+
+@pytest.fixture(scope="module")
+def bundled_sheets():
+    with pd.ExcelFile(investment_data.BUNDLED_EXCEL_PATH) as excel:
+        return {name: excel.parse(name) for name in excel.sheet_names
+                if name in investment_data.DASHBOARD_SHEETS}
+
+def write_workbook(path, sheets):
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return str(path)
+
+def add_next_day(sheets):
+    """Every daily sheet with a copy of its last day appended as the following day"""
+    sheets = dict(sheets)
+    for name in DAILY_SHEETS:
+        df = sheets[name]
+        last_day = df[df['Date'] == df['Date'].max()].copy()
+        last_day['Date'] += pd.Timedelta(days=1)
+        sheets[name] = pd.concat([df, last_day], ignore_index=True)
+    return sheets
+
+def pay_out_pending(sheets):
+    """Every daily sheet with its Pending rows marked Completed"""
+    sheets = dict(sheets)
+    for name, status in DAILY_SHEETS.items():
+        df = sheets[name].copy()
+        df.loc[df[status] == 'Pending', status] = 'Completed'
+        sheets[name] = df
+    return sheets
+
+def open_version(path, previous=None):
+    return investment_data.open_dataset(path, investment_data.file_content_hash(path), previous=previous)
+
+def assert_matches_full_parse(data, path):
+    full = open_version(path)
+    for table_name in investment_data.APPEND_ONLY_TABLES:
+        pd.testing.assert_frame_equal(data.table(table_name), full.table(table_name))
+        index, full_index = data.user_index(table_name), full.user_index(table_name)
+        assert index.keys() == full_index.keys()
+        for user_id, positions in full_index.items():
+            assert index[user_id].tolist() == positions.tolist()
+    pd.testing.assert_frame_equal(investment_data.get_company_daily(data), investment_data.get_company_daily(full))
+    return full
+
+@pytest.fixture
+def base_version(tmp_path, bundled_sheets):
+    data = open_version(write_workbook(tmp_path / "base.xlsx", bundled_sheets))
+    investment_data.warm_dataset(data)
+    return data
+
+def test_appended_day_matches_a_full_parse(tmp_path, bundled_sheets, base_version):
+    path = write_workbook(tmp_path / "next.xlsx", add_next_day(bundled_sheets))
+    data = open_version(path, previous=base_version)
+    assert_matches_full_parse(data, path)
+    for table_name in investment_data.APPEND_ONLY_TABLES:
+        assert data.appended_since(table_name) is not None
+
+def test_edits_above_the_watermark_match_a_full_parse(tmp_path, bundled_sheets, base_version):
+    assert (base_version.daily_report['Payment'] == 'Pending').any()
+    path = write_workbook(tmp_path / "paid.xlsx", add_next_day(pay_out_pending(bundled_sheets)))
+    data = open_version(path, previous=base_version)
+    full = assert_matches_full_parse(data, path)
+    assert data.appended_since('daily_report') is not None
+
+    assert not (data.daily_report['Payment'] == 'Pending').any()
+    assert not (data.daily_profits['Payment_Status'] == 'Pending').any()
+
+    # The SQLite copy extended from the previous version's sees the payouts too
+    store = investment_data.build_sqlite_store(data)
+    full_store = investment_data.build_sqlite_store(full)
+    for user_id in full.user_index('daily_report'):
+        for status in ['Pending', 'Completed', 'Re-Invest']:
+            assert (store.user_profit_rows(user_id, payment_status=status).tolist()
+                    == full_store.user_profit_rows(user_id, payment_status=status).tolist())
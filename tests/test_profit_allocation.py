@@ -0,0 +1,61 @@
+"""The workbook written by profit_allocation.py must still load in the dashboard
+
+    python -m pytest tests
+
+Daily_Report is rebuilt into a copy of the bundled workbook and the copy is read back through
+open_dataset, so the formulas on the other sheets keep the values Excel last calculated.
+"""
+
+import os
+import sys
+import zipfile
+
+import pandas as pd
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import investment_data
+import profit_allocation
+
+SOURCE = investment_data.BUNDLED_EXCEL_PATH
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(investment_data, 'SNAPSHOT_DIR', str(tmp_path / "snapshots"))
+
+def open_version(path):
+    return investment_data.open_dataset(path, investment_data.file_content_hash(path))
+
+def test_output_round_trips_through_open_dataset(tmp_path):
+    output = str(tmp_path / "updated.xlsx")
+    assert profit_allocation.main(['--workbook', SOURCE, '--output', output]) == 0
+
+    source, updated = open_version(SOURCE), open_version(output)
+    sheets = pd.read_excel(SOURCE, sheet_name=[profit_allocation.CALCULATIONS_SHEET, profit_allocation.REPORT_SHEET])
+    expected = profit_allocation.build_daily_report(sheets[profit_allocation.CALCULATIONS_SHEET],
+                                                    sheets[profit_allocation.REPORT_SHEET])
+    report = updated.daily_report.dropna(subset=['Date', 'UserID'])
+    assert report['Date'].tolist() == expected['Date'].tolist()
+    assert report['UserID'].astype(str).tolist() == expected['UserID'].tolist()
+    assert report['Profit'].round(6).tolist() == expected['Profit'].round(6).tolist()
+
+    # Formula columns on the other sheets keep their cached values instead of turning into NaN
+    pd.testing.assert_series_equal(updated.investors['Total Profit Earned'], source.investors['Total Profit Earned'])
+    pd.testing.assert_series_equal(updated.daily_profits['Profit_With_Tax'], source.daily_profits['Profit_With_Tax'])
+
+    report_part = 'xl/worksheets/sheet3.xml'
+    with zipfile.ZipFile(SOURCE) as before, zipfile.ZipFile(output) as after:
+        assert before.namelist() == after.namelist()
+        changed = {name for name in before.namelist() if before.read(name) != after.read(name)}
+    assert report_part in changed and changed <= {report_part, 'xl/workbook.xml', 'xl/tables/table3.xml'}
+
+def test_output_is_required(capsys):
+    with pytest.raises(SystemExit):
+        profit_allocation.main(['--workbook', SOURCE])
+    assert "--output is required" in capsys.readouterr().err
+
+def test_source_is_never_overwritten():
+    with pytest.raises(ValueError):
+        profit_allocation.main(['--workbook', SOURCE, '--output', SOURCE])
@@ -0,0 +1,112 @@
+"""Profit table paging and totals must list exactly a user's filtered Daily_Report rows
+
+    python -m pytest tests
+
+Every user, payment status and date range the filters offer is paged through in every sort
+order and page size by following the next cursors (and back again by the previous ones);
+the pages must cover the filtered rows once each, in order, and user_profit_totals must
+match a plain sum over the same rows. Both query backends are checked.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import investment_data
+
+# The dashboard's payment filter, sort orders and page sizes (app.py), plus page sizes small
+# enough that the bundled workbook's users span many pages
+PAYMENT_STATUSES = ["All", "Completed", "Pending", "Recovered", "Re-Invest"]
+SORTS = ['date_desc', 'date_asc', 'profit_desc', 'profit_asc']
+PAGE_SIZES = [1, 3, 7, 25, 50, 100, 250]
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(investment_data, 'SNAPSHOT_DIR', str(tmp_path_factory.mktemp("snapshots")))
+        path = investment_data.BUNDLED_EXCEL_PATH
+        data = investment_data.open_dataset(path, investment_data.file_content_hash(path))
+        investment_data.warm_dataset(data)
+        yield data
+
+@pytest.fixture(params=['pandas', 'sqlite'])
+def backend(request, monkeypatch):
+    monkeypatch.setattr(investment_data, 'QUERY_BACKEND', request.param)
+    return request.param
+
+def date_ranges(report):
+    """No date filter, the whole history, a window in the middle, one day and a window with no rows"""
+    days = report['Date'].dropna().drop_duplicates().sort_values().dt.date.tolist()
+    middle = len(days) // 2
+    before = days[0] - pd.Timedelta(days=10)
+    return [None, [days[0], days[-1]], [days[middle - 5], days[middle + 5]], [days[middle], days[middle]],
+            [before, before + pd.Timedelta(days=5)]]
+
+def expected_rows(report, user_id, date_range, payment_status):
+    rows = report[report['UserID'] == user_id]
+    if date_range is not None:
+        rows = rows[rows['Date'].between(pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1]))]
+    if payment_status != 'All':
+        rows = rows[rows['Payment'] == payment_status]
+    return rows
+
+def assert_in_order(rows, sort_by):
+    column = 'Profit' if sort_by.startswith('profit') else 'Date'
+    values = rows[column]
+    present = values.notna().to_numpy()
+    # Missing dates or profits go last
+    assert not (~present[:-1] & present[1:]).any()
+    values = values[present]
+    assert values.is_monotonic_increasing if sort_by.endswith('asc') else values.is_monotonic_decreasing
+
+def page_through(frame, positions, sort_by, page_size):
+    """Every page from the first by the next cursors, then back to the first by the previous ones"""
+    pages, cursors, cursor = [], [], None
+    while True:
+        page, offset, next_cursor, previous_cursor = investment_data.profit_table_page(
+            frame, positions, sort_by, page_size, cursor)
+        assert offset == len(pages) * page_size
+        assert (previous_cursor is None) == (offset == 0)
+        pages.append(page)
+        cursors.append(cursor)
+        if next_cursor is None:
+            break
+        cursor = next_cursor
+
+    for index in range(len(pages) - 1, 0, -1):
+        _, _, _, previous_cursor = investment_data.profit_table_page(frame, positions, sort_by, page_size, cursors[index])
+        page, offset, _, _ = investment_data.profit_table_page(frame, positions, sort_by, page_size, previous_cursor)
+        assert offset == (index - 1) * page_size
+        assert page.tolist() == pages[index - 1].tolist()
+    return np.concatenate(pages)
+
+def test_pages_and_totals_match_the_filtered_rows(dataset, backend):
+    report = dataset.daily_report
+    checked = 0
+    for user_id in report['UserID'].dropna().unique():
+        for date_range in date_ranges(report):
+            for payment_status in PAYMENT_STATUSES:
+                expected = expected_rows(report, user_id, date_range, payment_status)
+
+                total, count = investment_data.user_profit_totals(user_id, dataset, date_range, payment_status)
+                assert total == pytest.approx(expected['Profit'].sum())
+                assert count == expected['Profit'].notna().sum()
+
+                frame, positions = investment_data.user_profit_positions(user_id, dataset, date_range, payment_status)
+                assert sorted(frame.index[positions]) == sorted(expected.index)
+                if not len(positions):
+                    continue
+                for sort_by in SORTS:
+                    for page_size in PAGE_SIZES:
+                        listed = page_through(frame, positions, sort_by, page_size)
+                        assert len(listed) == len(positions)
+                        assert sorted(frame.index[listed]) == sorted(expected.index)
+                        assert_in_order(frame.iloc[listed], sort_by)
+                        checked += 1
+    assert checked
@@ -0,0 +1,121 @@
+"""The investment data shared by all sessions must stay read-only
+
+    python -m pytest tests
+
+Renders the dashboard with Streamlit's AppTest through the user, filter, paging and
+comparison interactions with strict data checks on, then checks that no published table
+or derived table changed. Raw writes into the shared NumPy buffers must raise.
+"""
+
+import os
+import pathlib
+import sys
+from datetime import date
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import investment_data
+
+APP_PATH = os.path.join(REPO_DIR, "app.py")
+RUN_TIMEOUT_SECONDS = 120
+# AppTest before 1.29 can't parse the st.empty().container() the first page load uses
+APP_TEST_MIN_STREAMLIT = (1, 29)
+
+def widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"no widget labelled {label!r} on the page")
+
+def run_without_exception(element):
+    """Run one widget change (or the app) and fail on anything the script raised"""
+    app = element.run()
+    assert not app.exception, [exception.value for exception in app.exception]
+    return app
+
+@pytest.fixture
+def strict_data(tmp_path, monkeypatch):
+    """A fresh process-wide refresher over the bundled workbook, with strict data checks on"""
+    monkeypatch.setattr(investment_data, 'STRICT_DATA_CHECKS', True)
+    monkeypatch.setattr(investment_data, 'EXCEL_SOURCE_URL',
+                        pathlib.Path(investment_data.BUNDLED_EXCEL_PATH).as_uri())
+    monkeypatch.setattr(investment_data, 'DATA_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(investment_data, 'SNAPSHOT_DIR', str(tmp_path / "snapshots"))
+    monkeypatch.setattr(investment_data, '_data_refresher', None)
+    yield
+    if investment_data._data_refresher is not None:
+        investment_data._data_refresher.stop()
+
+@pytest.fixture(scope="module")
+def dataset():
+    """The bundled workbook loaded and warmed the way the refresher does it"""
+    path = investment_data.BUNDLED_EXCEL_PATH
+    data = investment_data.open_dataset(path, investment_data.file_content_hash(path))
+    investment_data.warm_dataset(data)
+    return data
+
+def streamlit_version():
+    import streamlit
+    return tuple(int(part) for part in streamlit.__version__.split('.')[:2])
+
+@pytest.mark.skipif(streamlit_version() < APP_TEST_MIN_STREAMLIT, reason="AppTest can't render the dashboard")
+def test_rendering_does_not_modify_shared_data(strict_data):
+    from streamlit.testing.v1 import AppTest
+
+    app = run_without_exception(AppTest.from_file(APP_PATH, default_timeout=RUN_TIMEOUT_SECONDS))
+    users = widget(app.selectbox, "Select your User ID:").options
+    assert users
+
+    for user in users:
+        app = run_without_exception(widget(app.selectbox, "Select your User ID:").select(user))
+        app = run_without_exception(widget(app.date_input, "Start Date").set_value(date(2017, 1, 1)))
+        for status in widget(app.selectbox, "Payment Status:").options:
+            app = run_without_exception(widget(app.selectbox, "Payment Status:").select(status))
+        app = run_without_exception(widget(app.selectbox, "Payment Status:").select("All"))
+        for sort in widget(app.selectbox, "Sort by:").options:
+            app = run_without_exception(widget(app.selectbox, "Sort by:").select(sort))
+            next_page = widget(app.button, "Next ▶")
+            if not next_page.disabled:
+                app = run_without_exception(next_page.click())
+        app = run_without_exception(widget(app.radio, "View:").set_value("Compare with Other Investors"))
+        app = run_without_exception(widget(app.radio, "View:").set_value("Your Data Only"))
+
+    data = investment_data.get_data_refresher().current
+    assert data is not None
+    assert data.modified_tables() == []
+
+def test_strict_checks_report_a_modified_table(monkeypatch):
+    monkeypatch.setattr(investment_data, 'STRICT_DATA_CHECKS', True)
+    path = investment_data.BUNDLED_EXCEL_PATH
+    data = investment_data.open_dataset(path, investment_data.file_content_hash(path))
+    daily_report = data.daily_report
+    assert data.modified_tables() == []
+
+    daily_report.loc[daily_report.index[0], 'Profit'] = daily_report['Profit'].iat[0] + 1
+    assert data.modified_tables() == ['table:daily_report']
+
+def test_raw_writes_into_shared_tables_raise(dataset):
+    for table_name in investment_data.TABLE_SCHEMAS:
+        table = dataset.table(table_name)
+        for col in table.select_dtypes('number').columns:
+            values = table[col].to_numpy()
+            if len(values):
+                with pytest.raises(ValueError):
+                    values[0] = 0
+
+def test_raw_writes_into_user_indexes_raise(dataset):
+    for table_name in investment_data.TABLE_SCHEMAS:
+        for positions in dataset.user_index(table_name).values():
+            with pytest.raises(ValueError):
+                positions[0] = 0
+
+def test_raw_writes_into_derived_tables_raise(dataset):
+    metrics = investment_data.get_investor_metrics(dataset)
+    with pytest.raises(ValueError):
+        metrics['roi'].to_numpy()[0] = 0
+    company_daily = investment_data.get_company_daily(dataset)
+    with pytest.raises(ValueError):
+        company_daily['cumulative_profit'].to_numpy()[0] = 0